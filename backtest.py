@@ -2,8 +2,11 @@ import numpy as np
 import pygame
 from config import LAYER1_COINS, LIGHT_GRAY, WIDTH, HEIGHT, WHITE, BLACK, GREEN, BAR_WIDTH, BAR_X, BAR_Y, BAR_HEIGHT, BACKTEST_RANGE, SWING_RANGE
 from fetcher import load_backtest_data
-from indicators import add_indicators
-from strategy import get_signal
+from indicator_cache import cache
+from strategy import SIGNAL_NAMES
+from backtest_engine import prepare_arrays, run_backtest_arrays, summarize
+from metrics import HOURS_PER_YEAR
+from monte_carlo import run as monte_carlo
 
 
 def run_backtest(screen):
@@ -11,149 +14,44 @@ def run_backtest(screen):
     font = pygame.font.SysFont("arial", 22)
     pygame.display.set_caption("Backtester")
 
-    coin_data = load_backtest_data()
     symbols = list(LAYER1_COINS.values())
-    aligned_index = None
+    coin_data = load_backtest_data(symbols)
 
-    for symbol in symbols:
-        df = coin_data.get(symbol)
-        if df is not None and len(df) >= BACKTEST_RANGE:
-            aligned_index = df.tail(BACKTEST_RANGE).index if aligned_index is None else aligned_index.intersection(df.index)
-    aligned_index = aligned_index[-BACKTEST_RANGE:]
-    n_steps = len(aligned_index)
-
-    capital = 1.0
     mouse_pos = (0, 0)
-    equity = np.zeros(n_steps)
-    equity[0] = capital
-    trades = []
-    in_position = False
-    holding_symbol = None
-    entry_price = 0
-    coins_with_indicators = {}
-    signals = {}
-    trades_graph = {
-        "win": {
-            "data": [0]*100,
-            "total": 0
-        },
-        "loss": {
-            "data": [0]*100,
-            "total": 0
-        }
-    }
-    stop_loss = 100
-    take_profit = 100
-    cooldown_time = 0
-    cooldown = 0
-    current_trade_graph = []
-    for symbol in symbols:
-        df = coin_data[symbol].copy()
-        df = add_indicators(df)
-        df["signal"] = df.apply(get_signal, axis=1)
-
-        # Store full df and signal list
-        coins_with_indicators[symbol] = df
-        signals[symbol] = df.loc[aligned_index, "signal"].tolist()
-
-    for i in range(1, n_steps):
-        current_index = aligned_index[i]
-
-        if i % 150 == 0:
-            screen.fill(WHITE)
-            draw_chart(screen, equity, i, trades_graph, mouse_pos)
-            progress = int((i / n_steps) * 10000) / 100
-            header = font.render(f"{progress}%", True, BLACK)
-            screen.blit(header, ((screen.get_size()[0] / 2) - (header.get_width() / 2), screen.get_size()[1] - 50))
-            pygame.display.flip()
-            pygame.event.pump()
-            pygame.display.update()
-
-        if in_position:
-            df = coins_with_indicators.get(holding_symbol)
-            if df is not None and current_index in df.index :
-                price = df.loc[current_index, "close"]
-                signal = signals[holding_symbol][i]
-                gain = (price - entry_price) / entry_price
-                current_trade_graph.append(gain)
-                if signal == "SELL" or -stop_loss > gain or take_profit < gain:
-                    print(
-                        f"{i} | {holding_symbol} | {df.index[-1]} | {signal} | ENTRY: {entry_price:.4f} | EXIT: {price:.4f} | GAIN: {gain:.4%}")
-
-                    if -stop_loss > gain:
-                        cooldown += cooldown_time
-                    capital *= (1 + gain)
-                    equity[i] = capital
-                    trades.append(gain)
-                    in_position = False
-                    holding_symbol = None
-                    entry_price = 0
-                    trade_ratio = len(current_trade_graph)/100
-                    trade_result = "win" if current_trade_graph[-1] > 0 else "loss"
-                    trades_graph[trade_result]['total'] += 1
-                    for idx in range(100):
-                        trade_idx = int(trade_ratio * idx)
-                        gain = current_trade_graph[trade_idx]
-                        trades_graph[trade_result]['data'][idx] += gain
-                    current_trade_graph = []
-                else:
-                    equity[i] = equity[i - 1]
-            else:
-                equity[i] = equity[i - 1]
+    # One vectorized pass over the symbols whose candles changed since the last run,
+    # limited to what the strategy and exits read
+    coins_with_indicators, arrays = prepare_arrays(coin_data, symbols, BACKTEST_RANGE)
+    print(f"Indicator cache: {cache.hits + cache.disk_hits} hits, {cache.misses} misses")
+    n_steps = len(arrays["index"])
+
+    def on_trade(kind, i, column, entry_price, price, gain, signal):
+        symbol = symbols[column]
+        df = coins_with_indicators[symbol]
+        if kind == "exit":
+            print(
+                f"{i} | {symbol} | {df.index[-1]} | {SIGNAL_NAMES[signal]} | ENTRY: {entry_price:.4f} | EXIT: {price:.4f} | GAIN: {gain:.4%}")
         else:
-            cooldown = max(0, cooldown-1)
-            for symbol in symbols:
-                if signals[symbol][i] == "BUY" and cooldown == 0:
-                    df = coins_with_indicators[symbol]
-                    if current_index in df.index:
-                        entry_price = df.loc[current_index, "close"]
-                        print(
-                            f"{i} | {symbol} | {df.index[-1]} | {"BUY"} | ENTRY: {entry_price:.4f}")
-
-                        take_profit = df.loc[current_index, "atr"] * 2.5
-                        stop_loss = df.loc[current_index, "atr"] * 3
-                        in_position = True
-                        holding_symbol = symbol
-
-                        break
-            equity[i] = capital if in_position else equity[i - 1]
-    # Calculate stats
-    total = len(trades)
-    wins = [t for t in trades if t > 0]
-    losses = [t for t in trades if t <= 0]
-    winrate = round(len(wins) / total * 100, 2) if total else 0
-    avg_trade = round(sum(trades) / total * 100, 2) if total else 0
-    avg_win = round(sum(wins) / len(wins) * 100, 2) if wins else 0
-    avg_loss = round(sum(losses) / len(losses) * 100, 2) if losses else 0
-    total_gain = round((capital - 1.0) * 100, 2)
-
-    # Max Drawdown
-    peak = equity[0]
-    max_drawdown = 0
-    for val in equity:
-        if val > peak:
-            peak = val
-        drawdown = (peak - val) / peak
-        max_drawdown = max(max_drawdown, drawdown)
-    max_drawdown = round(max_drawdown * 100, 2)
-
-    # Expectancy
-    expectancy = round((winrate / 100 * avg_win) + ((1 - winrate / 100) * avg_loss), 2)
-
-    # Profit Factor
-    profit_factor = round(sum(wins) / abs(sum(losses)), 2) if losses else float('inf')
-
-    # Sharpe Ratio (hourly, assuming 0 risk-free rate)
-    returns = np.diff(equity) / equity[:-1]
-    sharpe_ratio = round((np.mean(returns) / np.std(returns)) * np.sqrt(1), 2) if np.std(returns) else 0
-
-    # Avg time in trade (approx, assuming equally spaced trades)
-    avg_time_in_trade = round(len(equity) / total, 2) if total else 0
-    start_value = equity[0]
-    end_value = equity[-1]
-    total_hours = len(equity)
-    years = total_hours / (24 * 365)
-    cagr = (end_value / start_value) ** (1 / years) - 1
+            print(
+                f"{i} | {symbol} | {df.index[-1]} | {"BUY"} | ENTRY: {entry_price:.4f}")
+
+    def on_progress(i, state):
+        screen.fill(WHITE)
+        draw_chart(screen, state.equity, i, state.trades_graph, mouse_pos)
+        progress = int((i / n_steps) * 10000) / 100
+        header = font.render(f"{progress}%", True, BLACK)
+        screen.blit(header, ((screen.get_size()[0] / 2) - (header.get_width() / 2), screen.get_size()[1] - 50))
+        pygame.display.flip()
+        pygame.event.pump()
+        pygame.display.update()
+
+    state = run_backtest_arrays(arrays, on_trade=on_trade, on_progress=on_progress)
+    equity = state.equity
+    trades_graph = state.trades_graph
+    stats = summarize(equity, state.trades, state.capital)
+    mc = monte_carlo(state.trades, years=len(equity) / HOURS_PER_YEAR)
+    if mc:
+        print(f"🔎 Monte Carlo ({mc['paths']} paths): total gain {mc['total_gain_p5']}% to {mc['total_gain_p95']}%, "
+              f"max drawdown {mc['max_drawdown_p5']}% to {mc['max_drawdown_p95']}%, risk of ruin {mc['risk_of_ruin']}%")
 
     # Show results in Pygame
     while True:
@@ -166,24 +64,24 @@ def run_backtest(screen):
         screen.fill(WHITE)
         draw_chart(screen, equity, n_steps, trades_graph, mouse_pos)
 
-        stats = [
-            f"Total Trades: {total}",
-            f"Win Rate: {winrate}%",
-            f"Avg Trade: {avg_trade}%",
-            f"Avg Win: {avg_win}%",
-            f"Avg Loss: {avg_loss}%",
-            f"Total Gain: {total_gain}%"
+        stats1 = [
+            f"Total Trades: {stats['total']}",
+            f"Win Rate: {stats['winrate']}%",
+            f"Avg Trade: {stats['avg_trade']}%",
+            f"Avg Win: {stats['avg_win']}%",
+            f"Avg Loss: {stats['avg_loss']}%",
+            f"Total Gain: {stats['total_gain']}%"
         ]
         stats2 = [
-            f"Max Drawdown: {max_drawdown}%",
-            f"Expectancy: {expectancy}%",
-            f"Profit Factor: {profit_factor}",
-            f"Sharpe Ratio: {sharpe_ratio}",
-            f"Avg Time in Trade: {avg_time_in_trade}h",
-            f"CAGR: {int(cagr*10000)/100}%"
+            f"Max Drawdown: {stats['max_drawdown']}%",
+            f"Expectancy: {stats['expectancy']}%",
+            f"Profit Factor: {stats['profit_factor']}",
+            f"Sharpe Ratio: {stats['sharpe_ratio']}",
+            f"Avg Time in Trade: {stats['avg_time_in_trade']}h",
+            f"CAGR: {int(stats['cagr']*10000)/100}%"
         ]
 
-        for i, stat in enumerate(stats):
+        for i, stat in enumerate(stats1):
             screen.blit(font.render(stat, True, BLACK), (30, 230 + i * 24))
         for i, stat in enumerate(stats2):
             screen.blit(font.render(stat, True, BLACK), (300, 230 + i * 24))
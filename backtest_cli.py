@@ -0,0 +1,131 @@
+import argparse
+import json
+import math
+import os
+import pandas as pd
+from config import LAYER1_COINS, BACKTEST_RANGE
+from fetcher import load_backtest_data
+from backtest_engine import prepare_arrays, run_backtest_arrays, summarize, TP_MULT, SL_MULT
+from metrics import exposure, symbol_attribution, HOURS_PER_YEAR
+from execution import IntrabarExecution, AMBIGUOUS
+from monte_carlo import run as monte_carlo, PATHS, SEED
+from checkpoint import run_incremental
+
+OUTPUT_DIR = "backtest_results"
+
+
+# Same backtest as the pygame menu, without pygame, chart redraws or per-trade printing
+def run_headless(symbols=None, backtest_range=BACKTEST_RANGE, start=None, end=None, tp_mult=TP_MULT, sl_mult=SL_MULT,
+                 cooldown_time=0, fills="close", fine_interval="1m", ambiguous="stop", monte_carlo_paths=PATHS,
+                 seed=SEED):
+    symbols = list(LAYER1_COINS.values()) if symbols is None else symbols
+    coin_data = load_backtest_data(symbols, start=start, end=end)
+    if not coin_data:
+        return None
+    _, arrays = prepare_arrays(coin_data, symbols, backtest_range)
+    execution = IntrabarExecution(arrays, fine_interval=fine_interval, ambiguous=ambiguous) if fills == "intrabar" else None
+    state = run_backtest_arrays(arrays, tp_mult=tp_mult, sl_mult=sl_mult, cooldown_time=cooldown_time,
+                                execution=execution)
+    return build_report(state, arrays["index"], arrays["symbols"], execution, monte_carlo_paths, seed)
+
+
+def run_resumed(symbols=None, backtest_range=BACKTEST_RANGE, tp_mult=TP_MULT, sl_mult=SL_MULT, cooldown_time=0,
+                monte_carlo_paths=PATHS, seed=SEED):
+    # Close fills only: the checkpointed run is the plain backtest, extended over new candles
+    checkpoint = run_incremental(symbols, backtest_range, tp_mult, sl_mult, cooldown_time)
+    if checkpoint is None:
+        return None
+    return build_report(checkpoint["state"], checkpoint["index"], checkpoint["symbols"], None, monte_carlo_paths, seed)
+
+
+def build_report(state, index, symbols, execution=None, monte_carlo_paths=PATHS, seed=SEED):
+    trades = pd.DataFrame(state.trade_log, columns=["symbol", "entry_step", "exit_step", "entry_price", "exit_price", "gain"])
+    trades.insert(1, "entry_time", index[trades["entry_step"].to_numpy(dtype=int)])
+    trades.insert(2, "exit_time", index[trades["exit_step"].to_numpy(dtype=int)])
+    equity = pd.DataFrame({"equity": state.equity}, index=pd.Index(index, name="timestamp"))
+    stats = summarize(state.equity, state.trades, state.capital)
+    stats["exposure"] = round(exposure(state.trade_log, len(state.equity), state.entry_step) * 100, 2)
+    if execution is not None:
+        # Bars touching both levels, ordered from fine candles or by the ambiguous-bar rule
+        stats["fine_resolved_bars"] = execution.resolved
+        stats["assumed_order_bars"] = execution.assumed
+    if state.in_position:
+        stats["open_position"] = symbols[state.holding]
+    attribution = symbol_attribution(state.trade_log).rename_axis("symbol").reset_index()
+    report = {"stats": stats, "trades": trades, "equity": equity, "attribution": attribution}
+    if monte_carlo_paths and state.trades:
+        report["monte_carlo"] = {"seed": seed, **monte_carlo(state.trades, monte_carlo_paths, seed=seed,
+                                                             years=len(state.equity) / HOURS_PER_YEAR)}
+    return report
+
+
+def _json_value(value):
+    # inf profit factor and the like are not valid JSON
+    value = value.item() if hasattr(value, "item") else value
+    return None if isinstance(value, float) and not math.isfinite(value) else value
+
+
+def write_report(report, output_dir=OUTPUT_DIR, formats=("json", "csv")):
+    os.makedirs(output_dir, exist_ok=True)
+    stats = {key: _json_value(value) for key, value in report["stats"].items()}
+    with open(os.path.join(output_dir, "stats.json"), "w") as f:
+        json.dump(stats, f, indent=4)
+    if "monte_carlo" in report:
+        with open(os.path.join(output_dir, "monte_carlo.json"), "w") as f:
+            json.dump(report["monte_carlo"], f, indent=4)
+    if "csv" in formats:
+        report["trades"].to_csv(os.path.join(output_dir, "trades.csv"), index=False)
+        report["equity"].to_csv(os.path.join(output_dir, "equity.csv"))
+        report["attribution"].to_csv(os.path.join(output_dir, "attribution.csv"), index=False)
+    if "json" in formats:
+        report["trades"].to_json(os.path.join(output_dir, "trades.json"), orient="records", date_format="iso", indent=4,
+                                  double_precision=15)
+        report["equity"].reset_index().to_json(os.path.join(output_dir, "equity.json"), orient="records",
+                                               date_format="iso", double_precision=15)
+        report["attribution"].to_json(os.path.join(output_dir, "attribution.json"), orient="records", indent=4,
+                                      double_precision=15)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the backtest without a display and write the results to files")
+    parser.add_argument("--symbols", nargs="+", help="defaults to the coins in settings.json")
+    parser.add_argument("--range", type=int, default=BACKTEST_RANGE, help="aligned hours to backtest")
+    parser.add_argument("--start", help="first candle to load, e.g. 2024-01-01")
+    parser.add_argument("--end", help="last candle to load")
+    parser.add_argument("--tp-mult", type=float, default=TP_MULT)
+    parser.add_argument("--sl-mult", type=float, default=SL_MULT)
+    parser.add_argument("--cooldown", type=int, default=0)
+    parser.add_argument("--fills", choices=["close", "intrabar"], default="close",
+                        help="fill SL/TP at the close, or where the bar's high/low touches them")
+    parser.add_argument("--fine-interval", default="1m", help="stored candles that order bars touching both levels")
+    parser.add_argument("--ambiguous", choices=AMBIGUOUS, default="stop", help="which level a bar hit first when "
+                                                                              "finer candles can't tell")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the last checkpoint for these settings over newly stored candles "
+                             "(close fills; the window grows from the first run's start)")
+    parser.add_argument("--monte-carlo", type=int, default=PATHS, help="resampled equity paths, 0 to skip")
+    parser.add_argument("--seed", type=int, default=SEED, help="Monte Carlo seed")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--format", choices=["json", "csv", "both"], default="both")
+    args = parser.parse_args()
+
+    if args.resume:
+        report = run_resumed(args.symbols, args.range, args.tp_mult, args.sl_mult, args.cooldown, args.monte_carlo,
+                             args.seed)
+    else:
+        report = run_headless(args.symbols, args.range, args.start, args.end, args.tp_mult, args.sl_mult,
+                              args.cooldown, args.fills, args.fine_interval, args.ambiguous, args.monte_carlo,
+                              args.seed)
+    if report is None:
+        return
+    write_report(report, args.output_dir, ("json", "csv") if args.format == "both" else (args.format,))
+    stats = report["stats"]
+    print(f"✅ {stats['total']} trades, total gain {stats['total_gain']}%, results in {args.output_dir}")
+    if "monte_carlo" in report:
+        mc = report["monte_carlo"]
+        print(f"🔎 Monte Carlo ({mc['paths']} paths): total gain {mc['total_gain_p5']}% to {mc['total_gain_p95']}%, "
+              f"max drawdown {mc['max_drawdown_p5']}% to {mc['max_drawdown_p95']}%, risk of ruin {mc['risk_of_ruin']}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import numpy as np
+from indicator_cache import cached_indicator_frames
+from strategy import BUY, SELL, REQUIRED_COLUMNS, signal_array
+from metrics import HOURS_PER_YEAR, equity_returns, max_drawdown, sharpe_ratio, sortino_ratio, cagr, trade_stats
+
+TP_MULT = 2.5
+SL_MULT = 3
+PROGRESS_EVERY = 150
+# Per-candle values the engine and the execution models read, besides the signal
+ARRAY_COLUMNS = ("open", "high", "low", "close", "atr")
+
+
+def aligned_steps(coin_data, symbols, backtest_range):
+    # The last `backtest_range` timestamps shared by every symbol with enough history
+    aligned_index = None
+    for symbol in symbols:
+        df = coin_data.get(symbol)
+        if df is not None and len(df) >= backtest_range:
+            aligned_index = df.tail(backtest_range).index if aligned_index is None else aligned_index.intersection(df.index)
+    return aligned_index[-backtest_range:]
+
+
+def align_arrays(frames, symbols, aligned_index, signals):
+    # time x symbol arrays on the aligned index; `present` is False where a symbol has no candle.
+    # They are filled symbol by symbol, so each symbol's values are contiguous in memory.
+    n_steps, n_symbols = len(aligned_index), len(symbols)
+    values = {column: np.full((n_symbols, n_steps), np.nan) for column in ARRAY_COLUMNS}
+    signal = np.zeros((n_symbols, n_steps), dtype=np.int8)
+    present = np.zeros((n_symbols, n_steps), dtype=bool)
+    steps = _positions_key(aligned_index)
+    for column, symbol in enumerate(symbols):
+        df = frames.get(symbol)
+        if df is None or not len(df):
+            continue
+        # Frames are sorted by time, so one searchsorted places every aligned step
+        times = _positions_key(df.index)
+        if len(times) == n_steps and np.array_equal(times, steps):
+            found = rows = slice(None)
+        else:
+            rows = np.minimum(np.searchsorted(times, steps), len(times) - 1)
+            found = times[rows] == steps
+            rows = rows[found]
+        present[column, found] = True
+        for name, array in values.items():
+            array[column, found] = df[name].to_numpy(dtype=float)[rows]
+        signal[column, found] = signals[symbol][rows]
+    return {"index": aligned_index, "symbols": list(symbols), **{name: array.T for name, array in values.items()},
+            "signal": signal.T, "present": present.T}
+
+
+def prepare_arrays(coin_data, symbols, backtest_range, params=None):
+    # Indicator frames (from the cache where possible) and the aligned arrays the engine steps over
+    frames = cached_indicator_frames(coin_data, symbols, REQUIRED_COLUMNS + ["atr"], params=params)
+    signals = {symbol: signal_array(df) for symbol, df in frames.items()}
+    return frames, align_arrays(frames, symbols, aligned_steps(coin_data, symbols, backtest_range), signals)
+
+
+def history_arrays(coin_data, symbols):
+    # Indicators and signals over every stored candle, aligned on all timestamps any symbol has
+    frames = cached_indicator_frames(coin_data, symbols, REQUIRED_COLUMNS + ["atr"])
+    symbols = [s for s in symbols if s in frames]
+    index = frames[symbols[0]].index
+    for symbol in symbols[1:]:
+        index = index.union(frames[symbol].index)
+    signals = {symbol: signal_array(df) for symbol, df in frames.items()}
+    return align_arrays(frames, symbols, index, signals)
+
+
+def slice_arrays(arrays, start, end):
+    # Views into the full-history arrays, nothing is copied or recomputed
+    sliced = dict(arrays)
+    for key in ("index", "signal", "present") + ARRAY_COLUMNS:
+        sliced[key] = arrays[key][start:end]
+    return sliced
+
+
+def _positions_key(index):
+    # datetime64 searches much faster as its int64 view
+    values = np.asarray(index)
+    return values.view("i8") if values.dtype.kind == "M" else values
+
+
+class BacktestState:
+    # Everything the loop carries from one step to the next, so a run can stop and resume
+    def __init__(self, n_steps):
+        self.step = 1
+        self.capital = 1.0
+        self.equity = np.zeros(n_steps)
+        self.equity[0] = self.capital
+        self.trades = []
+        self.trade_log = []
+        self.holding = None
+        self.entry_step = None
+        self.entry_price = 0
+        self.take_profit = 100
+        self.stop_loss = 100
+        self.cooldown = 0
+        self.current_trade_graph = []
+        self.trades_graph = {
+            "win": {"data": np.zeros(100), "total": 0},
+            "loss": {"data": np.zeros(100), "total": 0},
+        }
+
+    @property
+    def in_position(self):
+        return self.holding is not None
+
+    def extend(self, n_steps):
+        # Room for steps appended after a checkpoint; they are filled in as the run reaches them
+        if n_steps > len(self.equity):
+            self.equity = np.concatenate([self.equity, np.zeros(n_steps - len(self.equity))])
+
+
+def run_backtest_arrays(arrays, state=None, end=None, tp_mult=TP_MULT, sl_mult=SL_MULT, cooldown_time=0,
+                        on_trade=None, on_progress=None, execution=None, offset=0):
+    # Same rules as the original DataFrame loop, stepping by integer position. Exits check
+    # the fractional gain against ATR multiples in price units, exactly as before. An execution
+    # model (see execution.py) can fill SL/TP inside the bar; otherwise everything fills at the close.
+    # Row r of the arrays is step offset + r, so a resumed run only needs arrays for its new steps.
+    close, atr, signal, present = arrays["close"], arrays["atr"], arrays["signal"], arrays["present"]
+    n_steps = offset + len(close)
+    end = n_steps if end is None else end
+    state = BacktestState(n_steps) if state is None else state
+    state.extend(n_steps)
+    equity = state.equity
+
+    # First symbol (in symbol order) with a BUY it can be entered on at each step, -1 for none
+    entries = (signal == BUY) & present
+    first_entry = np.where(entries.any(axis=1), entries.argmax(axis=1), -1)
+
+    for i in range(state.step, end):
+        if on_progress is not None and i % PROGRESS_EVERY == 0:
+            on_progress(i, state)
+
+        r = i - offset
+        holding = state.holding
+        if holding is not None:
+            if present[r, holding]:
+                price = close[r, holding]
+                sig = signal[r, holding]
+                fill = None
+                if execution is not None:
+                    fill = execution.exit(r, holding, state.entry_price, state.take_profit, state.stop_loss)
+                if fill is not None:
+                    price = fill[0]
+                gain = (price - state.entry_price) / state.entry_price
+                stopped = fill[1] == "stop" if fill is not None else -state.stop_loss > gain
+                state.current_trade_graph.append(gain)
+                if fill is not None or sig == SELL or stopped or state.take_profit < gain:
+                    if on_trade is not None:
+                        on_trade("exit", i, holding, state.entry_price, price, gain, sig)
+                    if stopped:
+                        state.cooldown += cooldown_time
+                    state.capital *= (1 + gain)
+                    equity[i] = state.capital
+                    state.trades.append(gain)
+                    state.trade_log.append({
+                        "symbol": arrays["symbols"][holding], "entry_step": state.entry_step, "exit_step": i,
+                        "entry_price": state.entry_price, "exit_price": price, "gain": gain,
+                    })
+                    _record_trade_graph(state)
+                    state.holding = None
+                    state.entry_step = None
+                    state.entry_price = 0
+                else:
+                    equity[i] = equity[i - 1]
+            else:
+                equity[i] = equity[i - 1]
+        else:
+            state.cooldown = max(0, state.cooldown - 1)
+            column = first_entry[r]
+            if column >= 0 and state.cooldown == 0:
+                state.entry_price = close[r, column]
+                state.take_profit = atr[r, column] * tp_mult
+                state.stop_loss = atr[r, column] * sl_mult
+                state.holding = column
+                state.entry_step = i
+                if on_trade is not None:
+                    on_trade("entry", i, column, state.entry_price, None, None, BUY)
+            equity[i] = state.capital if state.holding is not None else equity[i - 1]
+    state.step = max(state.step, end)
+    return state
+
+
+def close_open_position(state, arrays, offset=0):
+    # Exits a position still open after the run at its symbol's last close in the arrays, so results
+    # cut at the end of a window include it. Returns whether there was one.
+    if state.holding is None:
+        return False
+    column = state.holding
+    r = np.flatnonzero(arrays["present"][:, column])[-1]
+    price = arrays["close"][r, column]
+    gain = (price - state.entry_price) / state.entry_price
+    state.current_trade_graph.append(gain)
+    state.capital *= (1 + gain)
+    state.equity[state.step - 1] = state.capital
+    state.trades.append(gain)
+    state.trade_log.append({
+        "symbol": arrays["symbols"][column], "entry_step": state.entry_step, "exit_step": offset + r,
+        "entry_price": state.entry_price, "exit_price": price, "gain": gain,
+    })
+    _record_trade_graph(state)
+    state.holding = None
+    state.entry_step = None
+    state.entry_price = 0
+    return True
+
+
+def _record_trade_graph(state):
+    # Average path of winning and losing trades, sampled at 100 points of each trade
+    graph = state.current_trade_graph
+    trade_ratio = len(graph) / 100
+    trade_result = "win" if graph[-1] > 0 else "loss"
+    state.trades_graph[trade_result]["total"] += 1
+    samples = [graph[int(trade_ratio * idx)] for idx in range(100)]
+    state.trades_graph[trade_result]["data"] += samples
+    state.current_trade_graph = []
+
+
+def summarize(equity, trades, capital, periods_per_year=HOURS_PER_YEAR):
+    stats = trade_stats(trades)
+    total = stats["total"]
+    winrate = round(stats["winrate"], 2)
+    avg_win = round(stats["avg_win"], 2)
+    avg_loss = round(stats["avg_loss"], 2)
+    returns = equity_returns(equity)
+    return {
+        "total": total,
+        "winrate": winrate,
+        "avg_trade": round(stats["avg_trade"], 2),
+        "avg_win": avg_win,
+        "avg_loss": avg_loss,
+        "total_gain": round((capital - 1.0) * 100, 2),
+        "max_drawdown": round(max_drawdown(equity) * 100, 2),
+        # Expectancy from the rounded figures shown next to it
+        "expectancy": round((winrate / 100 * avg_win) + ((1 - winrate / 100) * avg_loss), 2),
+        "profit_factor": round(stats["profit_factor"], 2),
+        # Annualized from per-step returns
+        "sharpe_ratio": round(sharpe_ratio(returns, periods_per_year), 2),
+        "sortino_ratio": round(sortino_ratio(returns, periods_per_year), 2),
+        # Avg time in trade (approx, assuming equally spaced trades)
+        "avg_time_in_trade": round(len(equity) / total, 2) if total else 0,
+        "cagr": cagr(equity, periods_per_year),
+    }
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from backtest_engine import align_arrays, run_backtest_arrays
+from strategy import BUY, SELL, NEUTRAL
+from timing import timed
+
+
+def make_frames(symbols, rows):
+    index = pd.date_range("2020-01-01", periods=rows, freq="h")
+    frames, signals = {}, {}
+    for i in range(symbols):
+        close = 100 * np.cumprod(1 + np.random.randn(rows) * 0.01)
+        open_ = np.r_[close[0], close[:-1]]
+        spread = close * np.abs(np.random.randn(rows)) * 0.005
+        frames[f"S{i}"] = pd.DataFrame({"open": open_, "high": np.maximum(open_, close) + spread,
+                                        "low": np.minimum(open_, close) - spread, "close": close,
+                                        "atr": close * 0.0002}, index=index)
+        signals[f"S{i}"] = np.random.choice([BUY, SELL, NEUTRAL], rows, p=[0.002, 0.2, 0.798]).astype(np.int8)
+    return frames, signals
+
+
+def dataframe_backtest(frames, symbols, aligned_index, signals):
+    # The loop backtest.py used before the array engine, per-step DataFrame lookups included
+    for symbol in symbols:
+        frames[symbol]["signal"] = signals[symbol]
+    signal_lists = {symbol: frames[symbol].loc[aligned_index, "signal"].tolist() for symbol in symbols}
+    capital = 1.0
+    equity = np.zeros(len(aligned_index))
+    equity[0] = capital
+    trades = []
+    in_position = False
+    holding_symbol = None
+    entry_price = 0
+    stop_loss = take_profit = 100
+    for i in range(1, len(aligned_index)):
+        current_index = aligned_index[i]
+        if in_position:
+            df = frames[holding_symbol]
+            if current_index in df.index:
+                price = df.loc[current_index, "close"]
+                gain = (price - entry_price) / entry_price
+                if signal_lists[holding_symbol][i] == SELL or -stop_loss > gain or take_profit < gain:
+                    capital *= (1 + gain)
+                    equity[i] = capital
+                    trades.append(gain)
+                    in_position = False
+                else:
+                    equity[i] = equity[i - 1]
+            else:
+                equity[i] = equity[i - 1]
+        else:
+            for symbol in symbols:
+                if signal_lists[symbol][i] == BUY:
+                    df = frames[symbol]
+                    if current_index in df.index:
+                        entry_price = df.loc[current_index, "close"]
+                        take_profit = df.loc[current_index, "atr"] * 2.5
+                        stop_loss = df.loc[current_index, "atr"] * 3
+                        in_position = True
+                        holding_symbol = symbol
+                        break
+            equity[i] = capital if in_position else equity[i - 1]
+    return equity, trades
+
+
+def main():
+    for n_symbols, rows in [(19, 1000), (100, 8760), (300, 8760)]:
+        frames, signals = make_frames(n_symbols, rows)
+        symbols = list(frames)
+        index = frames[symbols[0]].index
+
+        (equity, trades), loop = timed(lambda: dataframe_backtest(frames, symbols, index, signals))
+        state, engine = timed(lambda: run_backtest_arrays(align_arrays(frames, symbols, index, signals)))
+
+        assert state.trades == trades and (state.equity == equity).all()
+        print(f"{n_symbols} symbols x {rows} steps, {len(trades)} trades: DataFrame loop {loop:.3f}s, "
+              f"array engine {engine:.3f}s ({loop / engine:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
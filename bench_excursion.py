@@ -0,0 +1,35 @@
+from backtest_engine import align_arrays, run_backtest_arrays
+from bench_backtest import make_frames
+from excursion import build_index, heatmap, outcomes, sequential, SL_GRID, TP_GRID
+from timing import timed
+
+
+def main():
+    for n_symbols, rows in [(19, 1000), (100, 8760)]:
+        frames, signals = make_frames(n_symbols, rows)
+        symbols = list(frames)
+        arrays = align_arrays(frames, symbols, frames[symbols[0]].index, signals)
+
+        index, built = timed(lambda: build_index(arrays))
+        maps, mapped = timed(lambda: heatmap(index))
+        indexed = built + mapped
+
+        # Re-running the engine for every pair is what the index replaces; its total gain must match
+        def rerun_all():
+            for sl_mult in SL_GRID:
+                for tp_mult in TP_GRID:
+                    state = run_backtest_arrays(arrays, tp_mult=tp_mult, sl_mult=sl_mult)
+                    assert (state.capital - 1) * 100 == maps["total_gain"].loc[sl_mult, tp_mult]
+
+        _, rerun = timed(rerun_all)
+
+        result = outcomes(index, 1.0, 2.5)
+        capital, trades = sequential(index, result["gain"], result["exit_step"], result["resolved"], result["stopped"], 6)
+        state = run_backtest_arrays(arrays, tp_mult=2.5, sl_mult=1.0, cooldown_time=6)
+        assert trades == state.trades and capital == state.capital
+        print(f"{n_symbols} symbols x {rows} steps, {len(index['steps'])} entries, {maps['total_gain'].size} pairs: "
+              f"engine re-runs {rerun:.3f}s, excursion index {indexed:.3f}s ({rerun / indexed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import random
+import timeit
+import pandas as pd
+from kline_store import decode_klines, arrays_to_frame
+
+
+def make_payload(count=1000):
+    start = 1_700_000_000_000
+    raw = []
+    for i in range(count):
+        open_time = start + i * 3_600_000
+        prices = [f"{random.uniform(1, 100_000):.8f}" for _ in range(4)]
+        raw.append([open_time, *prices, f"{random.uniform(0, 1e6):.8f}", open_time + 3_599_999,
+                    f"{random.uniform(0, 1e8):.8f}", random.randint(0, 100_000),
+                    f"{random.uniform(0, 1e6):.8f}", f"{random.uniform(0, 1e8):.8f}", "0"])
+    return raw
+
+
+# The decoding fetch_binance_ohlc used before decode_klines
+def legacy_decode(raw):
+    df = pd.DataFrame(raw, columns=[
+        "open_time", "open", "high", "low", "close", "volume",
+        "close_time", "quote_asset_volume", "trades", "taker_buy_base", "taker_buy_quote", "ignore"
+    ])
+    df = df[["open_time", "open", "high", "low", "close", "volume"]]
+    df.columns = ["timestamp", "open", "high", "low", "close", "volume"]
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    df.set_index("timestamp", inplace=True)
+    df = df.astype(float)
+    return df
+
+
+def bench(func, raw, number):
+    return min(timeit.repeat(lambda: func(raw), number=number, repeat=5)) / number * 1000
+
+
+def main():
+    raw = make_payload()
+    expected = legacy_decode(raw)
+    assert (arrays_to_frame(decode_klines(raw)).values == expected.values).all()
+
+    number = 100
+    legacy = bench(legacy_decode, raw, number)
+    arrays = bench(decode_klines, raw, number)
+    frame = bench(lambda r: arrays_to_frame(decode_klines(r)), raw, number)
+    print(f"legacy DataFrame path: {legacy:.3f} ms per 1000 klines")
+    print(f"decode_klines arrays:  {arrays:.3f} ms ({legacy / arrays:.1f}x)")
+    print(f"arrays + frame view:   {frame:.3f} ms ({legacy / frame:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+from backtest_engine import align_arrays, run_backtest_arrays
+from portfolio_backtest import run_portfolio_arrays, summarize_portfolio
+from bench_backtest import make_frames
+from timing import timed
+
+
+def main():
+    for n_symbols, rows in [(19, 1000), (100, 8760), (300, 8760 * 3)]:
+        frames, signals = make_frames(n_symbols, rows)
+        symbols = list(frames)
+        arrays = align_arrays(frames, symbols, frames[symbols[0]].index, signals)
+
+        # One slot, all cash in, symbol order: the single-position engine's trades
+        single = run_backtest_arrays(arrays)
+        one_slot = run_portfolio_arrays(arrays, max_positions=1, risk=1.0, rank="symbol")
+        assert one_slot.trades == single.trades
+        realized = one_slot.cash + one_slot.units @ one_slot.entry_price
+        assert abs(realized / single.capital - 1) < 1e-9
+
+        for max_positions in (5, 20):
+            state, elapsed = timed(lambda: run_portfolio_arrays(arrays, max_positions=max_positions, risk=0.2, seed=0))
+            stats = summarize_portfolio(state)
+            print(f"{n_symbols} symbols x {rows} steps, {max_positions} slots: {len(state.trades)} trades, "
+                  f"avg {stats['avg_open_positions']} open, {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+from rolling import rolling_max, rolling_min, rolling_mean_var
+from timing import best_of
+
+
+def main():
+    for symbols, rows in [(19, 1000), (300, 20000)]:
+        values = 100 * np.cumprod(1 + np.random.randn(rows, symbols) * 0.01, axis=0)
+        frame = pd.DataFrame(values)
+        for name, window, ours, theirs in [
+            ("max", 14, lambda w: rolling_max(values, w), lambda w: frame.rolling(w).max()),
+            ("min", 14, lambda w: rolling_min(values, w), lambda w: frame.rolling(w).min()),
+            ("mean/std", 20, lambda w: rolling_mean_var(values, w),
+             lambda w: (frame.rolling(w).mean(), frame.rolling(w).std(ddof=0))),
+        ]:
+            kernel = best_of(lambda: ours(window))
+            pandas = best_of(lambda: theirs(window))
+            print(f"{symbols} symbols x {rows} rows, rolling {name}: pandas {pandas:.4f}s, "
+                  f"kernel {kernel:.4f}s ({pandas / kernel:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import tempfile
+import numpy as np
+from fetcher import load_backtest_data
+from indicator_cache import IndicatorCache, cache_key, cached_indicator_frames
+from strategy import REQUIRED_COLUMNS
+
+COLUMNS = REQUIRED_COLUMNS + ["atr"]
+
+
+def same_frame(a, b):
+    if not (a.index.equals(b.index) and list(a.columns) == list(b.columns)):
+        return False
+    return all(np.array_equal(a[c].to_numpy(dtype=float), b[c].to_numpy(dtype=float), equal_nan=True)
+               for c in a.columns)
+
+
+# A cache entry must only depend on its key: the first symbol, with a gap in its candles, is cached
+# once on its own and once next to symbols with other candles, and both entries have to be equal,
+# in memory and after a reload from disk
+def main():
+    coin_data = load_backtest_data()
+    symbols = list(coin_data)
+    if len(symbols) < 3:
+        print("❌ Need at least three symbols of backtest data")
+        return
+    first = symbols[0]
+    coin_data[first] = coin_data[first].drop(coin_data[first].index[[100, 101, 500]])
+    coin_data[symbols[2]] = coin_data[symbols[2]].iloc[50:]
+    key = cache_key(first, "1h", coin_data[first], COLUMNS)
+
+    with tempfile.TemporaryDirectory() as alone_dir, tempfile.TemporaryDirectory() as mixed_dir:
+        alone = IndicatorCache(disk_dir=alone_dir)
+        mixed = IndicatorCache(disk_dir=mixed_dir)
+        cached_indicator_frames(coin_data, [first], COLUMNS, indicator_cache=alone)
+        cached_indicator_frames(coin_data, symbols[:3], COLUMNS, indicator_cache=mixed)
+        failures = []
+        if not same_frame(alone.get(key), mixed.get(key)):
+            failures.append("entry differs with other symbols in the same call")
+        if not same_frame(IndicatorCache(disk_dir=alone_dir).get(key), IndicatorCache(disk_dir=mixed_dir).get(key)):
+            failures.append("entry reloaded from disk differs with other symbols in the same call")
+
+    for failure in failures:
+        print(f"❌ {first}: {failure}")
+    if not failures:
+        print(f"✅ {first}: cached indicators are the same alone and next to symbols with other candles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from fetcher import load_backtest_data
+from indicators import compute_indicators
+from indicator_engine import IndicatorEngine, INDICATOR_COLUMNS
+
+# Registry parameters changed for the second pass; the engine has to follow them like compute_indicators
+OVERRIDES = {
+    "rsi_5": {"period": 7}, "ma_20": {"window": 10}, "rsi_down_3": {"days": 2},
+    "rsi_below_60_3d": {"level": 55, "days": 4}, "rsi_signal_buy": {"oversold": 35}, "rsi_signal_sell": {"level": 45},
+    "stoch_k": {"period": 9}, "bb_pct": {"window": 10, "num_std": 1.5}, "bb_signal_buy": {"level": 0.1},
+}
+
+
+# Compares the incremental engine with compute_indicators over the saved backtest data,
+# feeding the engine one candle at a time like the live screener does
+def main():
+    coin_data = load_backtest_data()
+    mismatches = 0
+    for params in (None, OVERRIDES):
+        engine = IndicatorEngine(params=params)
+        for symbol, df in coin_data.items():
+            expected = compute_indicators(df, params=params)
+            candles = df[["high", "low", "close"]].to_dict("records")
+            rows = [engine.update(symbol, timestamp, candle) for timestamp, candle in zip(df.index, candles)]
+            actual = pd.DataFrame(rows, index=df.index)
+
+            for column in INDICATOR_COLUMNS:
+                a = actual[column].to_numpy(dtype=float)
+                e = expected[column].to_numpy(dtype=float)
+                same = (a == e) | (np.isnan(a) & np.isnan(e))
+                if not same.all():
+                    mismatches += 1
+                    label = "overridden parameters" if params else "registered parameters"
+                    print(f"❌ {symbol} {column} ({label}): {int((~same).sum())} rows differ")
+    print("✅ Incremental indicators match compute_indicators" if not mismatches else f"❌ {mismatches} mismatches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import asyncio
+import tempfile
+import numpy as np
+import pandas as pd
+from indicators import add_indicators
+from indicator_engine import IndicatorEngine, INDICATOR_COLUMNS
+from kline_store import INTERVAL_MS, append_klines, load_klines, stored_symbols
+from kline_stream import KlineStream, replay_transport
+from resample import resample_ohlcv
+
+# Replays stored candles through KlineStream as exchange messages: a forming update before every
+# close, a duplicate close, and a run of missed closes that has to be backfilled. Every closed bar
+# must reach the store and the indicator engine exactly once, as add_indicators would compute it,
+# and the 4h bars built from the stream must match resample_ohlcv over the same candles.
+BARS = 400
+WARMUP = 300
+MISSED = range(340, 345)
+DUPLICATE = 320
+
+
+def kline_message(symbol, open_time, candle, closed):
+    open_ms = int(open_time.value // 1_000_000)
+    return {"stream": f"{symbol.lower()}usdt@kline_1h", "data": {"e": "kline", "s": f"{symbol}USDT", "k": {
+        "t": open_ms, "T": open_ms + INTERVAL_MS["1h"] - 1, "x": closed,
+        "o": str(candle["open"]), "h": str(candle["high"]), "l": str(candle["low"]),
+        "c": str(candle["close"]), "v": str(candle["volume"]),
+    }}}
+
+
+def replay_messages(symbol, source):
+    messages = []
+    for position in range(WARMUP, len(source)):
+        open_time, candle = source.index[position], source.iloc[position]
+        forming = dict(candle, close=(candle["open"] + candle["close"]) / 2)
+        messages.append(kline_message(symbol, open_time, forming, False))
+        if position not in MISSED:
+            messages.append(kline_message(symbol, open_time, candle, True))
+        if position == DUPLICATE:
+            messages.append(kline_message(symbol, open_time, candle, True))
+    return messages
+
+
+def main():
+    symbols = stored_symbols()
+    if not symbols:
+        print("❌ No stored candles to replay, run the screener or backtest once first")
+        return
+    symbol = symbols[0]
+    source = load_klines(symbol, tail=BARS)
+    engine = IndicatorEngine()
+    rows = []
+    backfills = []
+    higher_closes = []
+
+    with tempfile.TemporaryDirectory() as root:
+        stream = None
+
+        def backfill(symbol, interval, limit):
+            # The exchange's REST history: every bar up to the newest one the stream has seen
+            latest = stream.latest.get(symbol)
+            until = latest[0] if latest else source.index[WARMUP - 1]
+            append_klines(symbol, interval, source[source.index <= until], root)
+            backfills.append(until)
+            return load_klines(symbol, interval, tail=limit, root=root)
+
+        stream = KlineStream([symbol], on_bar_close=lambda symbol, df: rows.append(engine.append(symbol, df)),
+                             transport=replay_transport(replay_messages(symbol, source)), backfill=backfill, root=root,
+                             higher_intervals=["4h"],
+                             on_higher_bar_close=lambda symbol, interval, df: higher_closes.append(df.index[-1]))
+        asyncio.run(stream.run())
+        higher = stream.higher_frame(symbol, "4h")
+        stored = load_klines(symbol, root=root)
+
+    columns = ["open", "high", "low", "close", "volume"]
+    failures = []
+    if not (stored.index.equals(source.index) and
+            np.array_equal(stored[columns].to_numpy(), source[columns].to_numpy())):
+        failures.append(f"store has {len(stored)} of {len(source)} bars or different values")
+    if backfills != [source.index[WARMUP - 1], source.index[MISSED[-1] + 1]]:
+        failures.append(f"expected a warm-up and one gap backfill, got {len(backfills)}")
+    actual = pd.concat(rows)
+    expected = add_indicators(source)
+    if not actual.index.equals(source.index):
+        failures.append(f"engine saw {len(actual)} of {len(source)} bars")
+    else:
+        for column in INDICATOR_COLUMNS:
+            a = actual[column].to_numpy(dtype=float)
+            e = expected[column].to_numpy(dtype=float)
+            if not ((a == e) | (np.isnan(a) & np.isnan(e))).all():
+                failures.append(f"{column} differs from add_indicators")
+    # Volume sums can round differently from numpy's reduceat in the last bit
+    expected_higher = resample_ohlcv(source, "4h")
+    if not (higher.index.equals(expected_higher.index) and
+            np.array_equal(higher[columns[:4]].to_numpy(), expected_higher[columns[:4]].to_numpy()) and
+            np.allclose(higher["volume"], expected_higher["volume"], rtol=1e-12, atol=0)):
+        failures.append("streamed 4h bars differ from resample_ohlcv")
+    if not higher_closes or higher_closes[-1] != expected_higher.index[-1] or \
+            any(a >= b for a, b in zip(higher_closes, higher_closes[1:])):
+        failures.append("4h bar closes were not reported in order up to the last one")
+    for failure in failures:
+        print(f"❌ {symbol}: {failure}")
+    if not failures:
+        print(f"✅ {symbol}: {len(source) - WARMUP} streamed bars, {len(MISSED)} backfilled, "
+              f"{len(higher_closes)} 4h closes, store, indicator engine and 4h bars match")
+
+
+if __name__ == "__main__":
+    main()
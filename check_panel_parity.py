@@ -0,0 +1,53 @@
+import numpy as np
+from fetcher import load_backtest_data
+from indicators import INDICATORS, compute_indicators
+from indicator_panel import panel_indicator_frames
+
+# Candles removed from the stored data so symbols no longer share one index: a gap inside the
+# first symbol's history and a later start for the second one
+GAP = [100, 101, 500]
+LATE_START = 50
+
+
+def same(a, b):
+    return (a == b) | (np.isnan(a) & np.isnan(b))
+
+
+# Every symbol's panel frame, computed next to symbols with other candles, must equal the one
+# it gets alone, and match compute_indicators: exactly for flags, to rounding for values
+def main():
+    coin_data = load_backtest_data()
+    symbols = list(coin_data)
+    if len(symbols) < 2:
+        print("❌ Need at least two symbols of backtest data")
+        return
+    coin_data[symbols[0]] = coin_data[symbols[0]].drop(coin_data[symbols[0]].index[GAP])
+    coin_data[symbols[1]] = coin_data[symbols[1]].iloc[LATE_START:]
+    frames = panel_indicator_frames(coin_data, symbols)
+
+    mismatches = 0
+    for symbol in symbols:
+        alone = panel_indicator_frames({symbol: coin_data[symbol]})[symbol]
+        expected = compute_indicators(coin_data[symbol])
+        if not frames[symbol].index.equals(coin_data[symbol].index):
+            mismatches += 1
+            print(f"❌ {symbol}: {len(frames[symbol])} rows, expected {len(coin_data[symbol])}")
+            continue
+        for column in INDICATORS:
+            a = frames[symbol][column].to_numpy(dtype=float)
+            b = alone[column].to_numpy(dtype=float)
+            e = expected[column].to_numpy(dtype=float)
+            flag = expected[column].dtype == bool
+            close = same(a, e) if flag else np.isclose(a, e, rtol=1e-9, atol=1e-9) | (np.isnan(a) & np.isnan(e))
+            if not same(a, b).all():
+                mismatches += 1
+                print(f"❌ {symbol} {column}: {int((~same(a, b)).sum())} rows differ from the symbol alone")
+            if not close.all():
+                mismatches += 1
+                print(f"❌ {symbol} {column}: {int((~close).sum())} rows differ from compute_indicators")
+    print("✅ Panel indicators match per symbol on unequal indexes" if not mismatches else
+          f"❌ {mismatches} mismatches")
+
+
+if __name__ == "__main__":
+    main()
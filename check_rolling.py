@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from indicators import bollinger_pct
+from rolling import rolling_mean_var, RollingStats
+
+ROWS = 200_000
+WINDOW = 20
+NUM_STD = 2
+
+
+# Compares rolling_mean_var and %B with pandas on a long series that trends from 100 to
+# 60000 and then goes flat at low volatility, where long running sums lose precision
+def drifting_series(rows=ROWS, seed=0):
+    rng = np.random.default_rng(seed)
+    level = np.concatenate([np.linspace(100, 60000, rows // 2), np.full(rows - rows // 2, 60000.0)])
+    return level * (1 + rng.standard_normal(rows) * 1e-4)
+
+
+def main():
+    close = drifting_series()
+    series = pd.Series(close)
+    mean, var = rolling_mean_var(close, WINDOW)
+    expected_mean = series.rolling(WINDOW).mean().to_numpy()
+    expected_std = series.rolling(WINDOW).std(ddof=0).to_numpy()
+    std_error = np.nanmax(np.abs(np.sqrt(var) - expected_std) / expected_std)
+    mean_error = np.nanmax(np.abs(mean - expected_mean) / expected_mean)
+
+    band = NUM_STD * expected_std
+    expected_pct = (close - (expected_mean - band)) / (2 * band)
+    pct_error = np.nanmax(np.abs(bollinger_pct(close, WINDOW, NUM_STD) - expected_pct))
+
+    stats = RollingStats(WINDOW)
+    incremental = np.array([stats.push(value) for value in close[-10 * WINDOW:]])
+    tail_mean, tail_var = rolling_mean_var(close[-10 * WINDOW:], WINDOW)
+    same = np.array_equal(incremental[:, 0], tail_mean, equal_nan=True) and \
+        np.array_equal(incremental[:, 1], tail_var, equal_nan=True)
+
+    print(f"🔎 {ROWS} rows: mean rel error {mean_error:.2e}, std rel error {std_error:.2e}, %B abs error {pct_error:.2e}")
+    ok = std_error < 1e-3 and pct_error < 1e-3 and mean_error < 1e-9 and same
+    print("✅ Rolling mean/std match pandas" if ok else "❌ Rolling mean/std drift from pandas")
+
+
+if __name__ == "__main__":
+    main()
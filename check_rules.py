@@ -0,0 +1,27 @@
+import numpy as np
+from rules import Rule
+
+# prev() has no history before the first bar; as a condition it counts as false there,
+# so "not prev(...)" holds and "prev(...) and ..." does not
+CASES = [
+    ("prev(rsi_5 < 50) and rsi_5 < 50", [False, False, False, True]),
+    ("not prev(rsi_5 > 50)", [True, True, False, True]),
+    ("prev(rsi_5 < 50) or rsi_5 > 50", [False, True, False, True]),
+    ("prev(rsi_down_3)", [False, True, False, True]),
+    ("prev(rsi_5 < 50, 2)", [False, False, True, False]),
+]
+
+
+def main():
+    cols = {"rsi_5": np.array([40.0, 60.0, 40.0, 40.0]), "rsi_down_3": np.array([1.0, 0.0, 1.0, 1.0])}
+    failures = 0
+    for expression, expected in CASES:
+        actual = Rule(expression)(cols, 4).tolist()
+        if actual != expected:
+            failures += 1
+            print(f"❌ {expression}: {actual}, expected {expected}")
+    print("✅ prev() conditions are false without history" if not failures else f"❌ {failures} rules differ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from config import LAYER1_COINS, BACKTEST_RANGE
+from fetcher import load_backtest_data
+from indicator_cache import params_fingerprint
+from indicator_engine import IndicatorEngine, INDICATOR_COLUMNS
+from strategy import buy_rule, sell_rule, signal_array, REQUIRED_COLUMNS, RULE_HISTORY
+from backtest_engine import prepare_arrays, align_arrays, run_backtest_arrays, summarize, TP_MULT, SL_MULT
+
+CHECKPOINT_DIR = "backtest_checkpoints"
+# Resuming needs the incremental engine to produce every column the rules read
+RESUMABLE = set(REQUIRED_COLUMNS + ["atr"]) <= set(INDICATOR_COLUMNS) | {"open", "high", "low", "close", "volume"}
+
+
+def params_key(symbols, backtest_range, tp_mult, sl_mult, cooldown_time, interval="1h"):
+    # Everything besides the candles that decides the trades
+    payload = json.dumps({
+        "symbols": list(symbols), "backtest_range": backtest_range, "interval": interval,
+        "buy_rule": buy_rule.expression, "sell_rule": sell_rule.expression,
+        "indicators": params_fingerprint(REQUIRED_COLUMNS + ["atr"]),
+        "tp_mult": tp_mult, "sl_mult": sl_mult, "cooldown_time": cooldown_time,
+    }, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def data_fingerprint(df, last):
+    # A symbol's candles up to `last`; any backfill or rewrite of that history changes it
+    df = df[df.index <= last]
+    digest = hashlib.sha1(np.ascontiguousarray(df.index.values.view("i8")).tobytes())
+    digest.update(np.ascontiguousarray(df[["open", "high", "low", "close"]].to_numpy(dtype=float)).tobytes())
+    return digest.hexdigest()
+
+
+def checkpoint_path(key, checkpoint_dir=CHECKPOINT_DIR):
+    return os.path.join(checkpoint_dir, f"{key}.pkl")
+
+
+def load_checkpoint(key, checkpoint_dir=CHECKPOINT_DIR):
+    path = checkpoint_path(key, checkpoint_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"⚠️ Could not read checkpoint {path}: {e}")
+        return None
+
+
+def save_checkpoint(key, checkpoint, checkpoint_dir=CHECKPOINT_DIR):
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    path = checkpoint_path(key, checkpoint_dir)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def _tail(frame, last_step):
+    # Rows the next resume needs: enough for the rules' lookback, plus any candle after the last aligned step
+    first_new = frame.index.searchsorted(last_step, "right")
+    return frame.iloc[min(first_new, max(len(frame) - RULE_HISTORY, 0)):]
+
+
+def _seal(checkpoint, coin_data):
+    last = {symbol: checkpoint["engine"].last_timestamp[symbol] for symbol in checkpoint["tails"]}
+    checkpoint["last"] = last
+    checkpoint["fingerprints"] = {symbol: data_fingerprint(coin_data[symbol], last[symbol]) for symbol in last}
+    for symbol, frame in checkpoint["tails"].items():
+        checkpoint["tails"][symbol] = _tail(frame, checkpoint["index"][-1])
+    return checkpoint
+
+
+def fresh_checkpoint(coin_data, symbols, backtest_range, tp_mult=TP_MULT, sl_mult=SL_MULT, cooldown_time=0,
+                     engine=True):
+    # The usual full backtest, plus the incremental indicator state at every symbol's last candle
+    _, arrays = prepare_arrays(coin_data, symbols, backtest_range)
+    state = run_backtest_arrays(arrays, tp_mult=tp_mult, sl_mult=sl_mult, cooldown_time=cooldown_time)
+    if not engine:
+        return {"symbols": arrays["symbols"], "index": arrays["index"], "state": state}
+    engine = IndicatorEngine()
+    tails = {symbol: engine.append(symbol, coin_data[symbol]) for symbol in symbols if symbol in coin_data}
+    checkpoint = {
+        "symbols": arrays["symbols"], "index": arrays["index"], "state": state, "engine": engine, "tails": tails,
+        # The symbols whose shared timestamps make up the steps, as in aligned_steps
+        "aligned_symbols": [s for s in symbols if s in coin_data and len(coin_data[s]) >= backtest_range],
+    }
+    return _seal(checkpoint, coin_data)
+
+
+def matches(checkpoint, coin_data):
+    return all(symbol in coin_data and data_fingerprint(coin_data[symbol], last) == checkpoint["fingerprints"][symbol]
+               for symbol, last in checkpoint["last"].items())
+
+
+def resume(checkpoint, coin_data, tp_mult=TP_MULT, sl_mult=SL_MULT, cooldown_time=0):
+    # Feeds only the candles appended since the checkpoint through the indicator state and the
+    # backtest loop; returns the number of new steps
+    engine = checkpoint["engine"]
+    last_step = checkpoint["index"][-1]
+    frames, signals = {}, {}
+    for symbol, tail in checkpoint["tails"].items():
+        new_rows = engine.append(symbol, coin_data[symbol])
+        frames[symbol] = pd.concat([tail, new_rows]) if len(new_rows) else tail
+        signals[symbol] = signal_array(frames[symbol])
+
+    new_index = None
+    for symbol in checkpoint["aligned_symbols"]:
+        index = frames[symbol].index
+        index = index[index > last_step]
+        new_index = index if new_index is None else new_index.intersection(index)
+    if new_index is not None and len(new_index):
+        arrays = align_arrays(frames, checkpoint["symbols"], new_index, signals)
+        run_backtest_arrays(arrays, state=checkpoint["state"], tp_mult=tp_mult, sl_mult=sl_mult,
+                            cooldown_time=cooldown_time, offset=len(checkpoint["index"]))
+        checkpoint["index"] = checkpoint["index"].append(new_index)
+    # Candles past the last shared step stay in the tails until every aligned symbol has them
+    checkpoint["tails"] = frames
+    _seal(checkpoint, coin_data)
+    return 0 if new_index is None else len(new_index)
+
+
+def run_incremental(symbols=None, backtest_range=BACKTEST_RANGE, tp_mult=TP_MULT, sl_mult=SL_MULT, cooldown_time=0,
+                    checkpoint_dir=CHECKPOINT_DIR):
+    # The backtest from the checkpoint for these settings, extended over any candles stored since.
+    # Steps start where the first run started, so the window grows instead of sliding.
+    symbols = list(LAYER1_COINS.values()) if symbols is None else symbols
+    coin_data = load_backtest_data(symbols)
+    if not coin_data:
+        return None
+    if not RESUMABLE:
+        print("⚠️ The rules use columns the incremental engine lacks, running the full backtest")
+        return fresh_checkpoint(coin_data, symbols, backtest_range, tp_mult, sl_mult, cooldown_time, engine=False)
+
+    key = params_key(symbols, backtest_range, tp_mult, sl_mult, cooldown_time)
+    checkpoint = load_checkpoint(key, checkpoint_dir)
+    if checkpoint is not None and not matches(checkpoint, coin_data):
+        print("⚠️ Stored candles changed since the checkpoint, running the full backtest")
+        checkpoint = None
+    if checkpoint is None:
+        checkpoint = fresh_checkpoint(coin_data, symbols, backtest_range, tp_mult, sl_mult, cooldown_time)
+        print(f"🔎 No checkpoint, backtested {len(checkpoint['index'])} steps")
+    else:
+        added = resume(checkpoint, coin_data, tp_mult, sl_mult, cooldown_time)
+        print(f"✅ Resumed from checkpoint, backtested {added} new steps")
+    save_checkpoint(key, checkpoint, checkpoint_dir)
+    return checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest that resumes from its last checkpoint over new candles")
+    parser.add_argument("--symbols", nargs="+", help="defaults to the coins in settings.json")
+    parser.add_argument("--range", type=int, default=BACKTEST_RANGE, help="steps in the first, full run")
+    parser.add_argument("--tp-mult", type=float, default=TP_MULT)
+    parser.add_argument("--sl-mult", type=float, default=SL_MULT)
+    parser.add_argument("--cooldown", type=int, default=0)
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR)
+    args = parser.parse_args()
+
+    checkpoint = run_incremental(args.symbols, args.range, args.tp_mult, args.sl_mult, args.cooldown,
+                                 args.checkpoint_dir)
+    if checkpoint is None:
+        return
+    state = checkpoint["state"]
+    for key, value in summarize(state.equity, state.trades, state.capital).items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ BINANCE_SECRET = None
 SLACK_WEBHOOK_URL = None
 SEND_SLACK = None
 AUTO_TRADE = None
+STREAM_KLINES = None
 
 WHITE = None
 GRAY = None
@@ -27,6 +28,9 @@ BACKTEST_RANGE = None
 SWINGS_LOOK_BACK = None
 SWING_RANGE = None
 TREND_TOLERANCE = None
+TREND_FILTER = None
+BUY_RULE = None
+SELL_RULE = None
 BUY_RSI = None
 ATR_MULT = None
 SELL_RSI = None
@@ -35,6 +39,7 @@ SELL_STOCH = None
 BUY_BP = None
 SELL_BP = None
 RISK_MANAGEMENT = None
+MAX_POSITIONS = None
 
 def load_settings():
     with open(SETTINGS_PATH, "r") as f:
@@ -50,11 +55,11 @@ def save_settings(new_settings):
 def load(s=None):
     global settings, LAYER1_COINS, BINANCE_URL, BINANCE_TRADE_URL
     global BINANCE_KEY, BINANCE_SECRET, SLACK_WEBHOOK_URL
-    global SEND_SLACK, AUTO_TRADE
+    global SEND_SLACK, AUTO_TRADE, STREAM_KLINES
     global WHITE, GRAY, LIGHT_GRAY, BLACK, GREEN
     global WIDTH, HEIGHT, BAR_WIDTH, BAR_HEIGHT, BAR_X, BAR_Y
-    global BACKTEST_RANGE, SWINGS_LOOK_BACK, SWING_RANGE, TREND_TOLERANCE
-    global BUY_RSI, SELL_RSI, BUY_STOCH, SELL_STOCH, BUY_BP, SELL_BP, RISK_MANAGEMENT
+    global BACKTEST_RANGE, SWINGS_LOOK_BACK, SWING_RANGE, TREND_TOLERANCE, TREND_FILTER, BUY_RULE, SELL_RULE
+    global BUY_RSI, SELL_RSI, BUY_STOCH, SELL_STOCH, BUY_BP, SELL_BP, RISK_MANAGEMENT, MAX_POSITIONS
 
     settings = s if s else load_settings()
 
@@ -66,6 +71,7 @@ def load(s=None):
     SLACK_WEBHOOK_URL = settings["keys and secrets"]['slack key']
     SEND_SLACK = settings["conditions"]["send slack"]
     AUTO_TRADE = settings["conditions"]["auto trade"]
+    STREAM_KLINES = settings["conditions"]["stream klines"]
 
     WHITE = (255, 255, 255)
     GRAY = (200, 200, 200)
@@ -84,6 +90,9 @@ def load(s=None):
     SWINGS_LOOK_BACK = settings['strategy']["swing look back"]
     SWING_RANGE = settings['strategy']["swing range"]
     TREND_TOLERANCE = settings['strategy']["trend tolerance"]
+    TREND_FILTER = settings['strategy']["trend filter"]
+    BUY_RULE = settings['strategy']["buy rule"]
+    SELL_RULE = settings['strategy']["sell rule"]
     BUY_RSI = settings['strategy']["buy rsi"]
     SELL_RSI = settings['strategy']["sell rsi"]
     BUY_STOCH = settings['strategy']["but stoch"]
@@ -92,11 +101,12 @@ def load(s=None):
     ATR_MULT = settings['strategy']["atr mult"]
     SELL_BP = settings['strategy']["sell bp"]
     RISK_MANAGEMENT = settings['strategy']["risk management"]
+    MAX_POSITIONS = settings['strategy']["max positions"]
 
 def reload():
     global settings
-    global BUY_RSI, SELL_RSI, BUY_STOCH, SELL_STOCH, BUY_BP, SELL_BP, RISK_MANAGEMENT
-    global AUTO_TRADE, SEND_SLACK, BACKTEST_RANGE
+    global BUY_RSI, SELL_RSI, BUY_STOCH, SELL_STOCH, BUY_BP, SELL_BP, RISK_MANAGEMENT, MAX_POSITIONS
+    global AUTO_TRADE, SEND_SLACK, BACKTEST_RANGE, STREAM_KLINES, TREND_FILTER, BUY_RULE, SELL_RULE
     global WIDTH, HEIGHT, BAR_WIDTH, BAR_HEIGHT, BAR_X, BAR_Y
     # ... add all other globals you want to update
 
@@ -111,9 +121,14 @@ def reload():
     BUY_BP = settings['strategy']["buy bp"]
     SELL_BP = settings['strategy']["sell bp"]
     RISK_MANAGEMENT = settings['strategy']["risk management"]
+    MAX_POSITIONS = settings['strategy']["max positions"]
     AUTO_TRADE = settings["conditions"]["auto trade"]
     SEND_SLACK = settings["conditions"]["send slack"]
+    STREAM_KLINES = settings["conditions"]["stream klines"]
     BACKTEST_RANGE = settings['strategy']["backtest range"]
+    TREND_FILTER = settings['strategy']["trend filter"]
+    BUY_RULE = settings['strategy']["buy rule"]
+    SELL_RULE = settings['strategy']["sell rule"]
     WIDTH, HEIGHT = settings['sizes']['width'], settings['sizes']['height']
     ATR_MULT = settings['strategy']["atr mult"]
     BAR_WIDTH = WIDTH - 100
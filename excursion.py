@@ -0,0 +1,209 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from config import LAYER1_COINS, BACKTEST_RANGE
+from fetcher import load_backtest_data
+from strategy import BUY, SELL
+from backtest_engine import prepare_arrays
+
+SL_GRID = np.arange(1, 25) * 0.25
+TP_GRID = np.arange(1, 25) * 0.25
+RESULTS_PATH = "excursion_heatmap.csv"
+
+
+def build_index(arrays, horizon=None):
+    # The forward path of every candidate entry (each BUY on a present candle) up to its SELL exit,
+    # or the end of the data, with the running best and worst gain along it. Rows are entries,
+    # columns are the symbol's following candles. The loop starts at step 1, so step 0 is skipped.
+    close, signal, present = arrays["close"], arrays["signal"], arrays["present"]
+    steps, columns = np.nonzero((signal == BUY) & present)
+    keep = steps > 0
+    steps, columns = steps[keep], columns[keep]
+    n_entries = len(steps)
+
+    # Each symbol's present candles, concatenated, so one gather builds every path
+    live = [np.flatnonzero(present[:, column]) for column in range(close.shape[1])]
+    offsets = np.concatenate([[0], np.cumsum([len(steps_) for steps_ in live])])
+    flat_live = np.concatenate(live)
+    start = np.zeros(n_entries, dtype=int)
+    length = np.zeros(n_entries, dtype=int)
+    sold = np.zeros(n_entries, dtype=bool)
+    for column in np.unique(columns):
+        mine = columns == column
+        sells = np.flatnonzero(present[:, column] & (signal[:, column] == SELL))
+        first = np.searchsorted(live[column], steps[mine], "right")
+        k = np.searchsorted(sells, steps[mine], "right")
+        has_sell = k < len(sells)
+        last = np.where(has_sell, np.searchsorted(live[column], sells[np.minimum(k, len(sells) - 1)], "right"),
+                        len(live[column])) if len(sells) else np.full(len(k), len(live[column]))
+        start[mine] = offsets[column] + first
+        length[mine] = last - first
+        sold[mine] = has_sell
+    if horizon is not None:
+        # Paths cut short by the horizon count as still open
+        sold &= length <= horizon
+        length = np.minimum(length, horizon)
+
+    width = max(int(length.max()) if n_entries else 0, 1)
+    positions = np.arange(width)
+    valid = positions < length[:, None]
+    path_steps = flat_live[np.minimum(start[:, None] + positions, len(flat_live) - 1)]
+    entry_price = close[steps, columns]
+    # Same expression as the engine's per-step gain, so thresholds compare bit for bit
+    gain = (close[path_steps, columns[:, None]] - entry_price[:, None]) / entry_price[:, None]
+    return {
+        "symbols": arrays["symbols"], "index": arrays["index"], "steps": steps, "columns": columns,
+        "first_of_step": np.r_[True, steps[1:] != steps[:-1]] if n_entries else np.zeros(0, dtype=bool),
+        "atr": arrays["atr"][steps, columns], "entry_price": entry_price, "path_steps": path_steps,
+        "length": length, "sold": sold, "gain": np.where(valid, gain, 0.0),
+        "best": np.maximum.accumulate(np.where(valid, gain, -np.inf), axis=1),
+        "worst": np.minimum.accumulate(np.where(valid, gain, np.inf), axis=1),
+    }
+
+
+def first_hits(index, mults, side):
+    # Position along each path where TP (gain > atr * mult) or SL (gain < -atr * mult) first triggers,
+    # one column per multiplier; the path width means never. Running extremes are monotonic, so the
+    # first hit is the count of positions before the threshold is crossed. A NaN ATR never triggers,
+    # as in the engine.
+    hits = np.empty((len(index["steps"]), len(mults)), dtype=int)
+    for j, mult in enumerate(mults):
+        threshold = index["atr"][:, None] * mult
+        crossed = index["best"] > threshold if side == "tp" else index["worst"] < -threshold
+        hits[:, j] = (~crossed).sum(axis=1)
+    return hits
+
+
+def excursions(index):
+    # Per entry: the largest favourable and adverse move in ATRs before the SELL exit, and how soon
+    best = np.where(index["length"] > 0, index["best"][:, -1], np.nan)
+    worst = np.where(index["length"] > 0, index["worst"][:, -1], np.nan)
+    rows = np.arange(len(index["steps"]))
+    valid = np.arange(index["gain"].shape[1]) < index["length"][:, None]
+    to_best = np.argmax(np.where(valid, index["gain"], -np.inf), axis=1)
+    to_worst = np.argmin(np.where(valid, index["gain"], np.inf), axis=1)
+    return pd.DataFrame({
+        "symbol": np.asarray(index["symbols"], dtype=object)[index["columns"]],
+        "entry_time": index["index"][index["steps"]],
+        "favourable_atr": best / index["atr"],
+        "adverse_atr": -worst / index["atr"],
+        "bars_to_favourable": index["path_steps"][rows, to_best] - index["steps"],
+        "bars_to_adverse": index["path_steps"][rows, to_worst] - index["steps"],
+        "bars_to_sell": np.where(index["sold"], index["path_steps"][rows, np.maximum(index["length"] - 1, 0)]
+                                 - index["steps"], -1),
+    })
+
+
+def _exits(index, sl_hits, tp_hits):
+    # Exit position for every entry and every SL x TP pair: the first hit or the SELL exit
+    length = index["length"].reshape((-1,) + (1,) * (sl_hits.ndim - 1))
+    hit = np.minimum(sl_hits, tp_hits)
+    position = np.maximum(np.minimum(hit, length - 1), 0)
+    resolved = (hit < length) | index["sold"].reshape(length.shape)
+    return position, resolved, sl_hits == position
+
+
+def outcomes(index, sl_mult, tp_mult):
+    # Every entry's trade under one SL/TP pair, read off the index
+    sl_hits = first_hits(index, [sl_mult], "sl")[:, 0]
+    tp_hits = first_hits(index, [tp_mult], "tp")[:, 0]
+    position, resolved, stopped = _exits(index, sl_hits, tp_hits)
+    rows = np.arange(len(position))
+    return {"gain": index["gain"][rows, position], "exit_step": index["path_steps"][rows, position],
+            "resolved": resolved, "stopped": stopped & resolved}
+
+
+def _walk(index, gains, exit_steps, resolved, stopped, cooldown_time=0):
+    # The single-position engine's walk through precomputed outcomes, one column per SL/TP pair: flat
+    # after each exit, the first symbol with a BUY is entered from the step after the exit (or after the
+    # cooldown on a stop). Every pair advances together, one trade per iteration.
+    firsts = np.flatnonzero(index["first_of_step"])
+    first_steps = index["steps"][firsts]
+    gains, exit_steps, resolved, stopped = (a[firsts] for a in (gains, exit_steps, resolved, stopped))
+    n_firsts, n_pairs = gains.shape
+    following = np.searchsorted(first_steps, exit_steps + np.where(stopped, max(1, cooldown_time), 1))
+    capital = np.ones(n_pairs)
+    taken = np.zeros((n_firsts, n_pairs), dtype=bool)
+    pos = np.zeros(n_pairs, dtype=int)
+    walking = np.full(n_pairs, n_firsts > 0)
+    while True:
+        walking &= pos < n_firsts
+        pairs = np.flatnonzero(walking)
+        if not len(pairs):
+            break
+        rows = pos[pairs]
+        # A trade that never closes stays open to the end, as in the engine
+        closed = resolved[rows, pairs]
+        walking[pairs[~closed]] = False
+        pairs, rows = pairs[closed], rows[closed]
+        capital[pairs] *= 1 + gains[rows, pairs]
+        taken[rows, pairs] = True
+        pos[pairs] = following[rows, pairs]
+    return capital, firsts, taken
+
+
+def sequential(index, gains, exit_steps, resolved, stopped, cooldown_time=0):
+    # Capital and trade gains the single-position engine ends with under one pair's outcomes
+    capital, firsts, taken = _walk(index, *(a[:, None] for a in (gains, exit_steps, resolved, stopped)),
+                                   cooldown_time=cooldown_time)
+    return capital[0], list(gains[firsts][taken[:, 0]])
+
+
+def heatmap(index, sl_grid=SL_GRID, tp_grid=TP_GRID, cooldown_time=0):
+    # Outcome of every SL x TP pair over every entry in one pass, plus the single-position total gain
+    sl_hits = first_hits(index, sl_grid, "sl")
+    tp_hits = first_hits(index, tp_grid, "tp")
+    position, resolved, stopped = _exits(index, sl_hits[:, :, None], tp_hits[:, None, :])
+    n_entries = len(index["steps"])
+    flat = position.reshape(n_entries, -1)
+    gains = np.take_along_axis(index["gain"], flat, axis=1).reshape(position.shape)
+    exit_steps = np.take_along_axis(index["path_steps"], flat, axis=1).reshape(position.shape)
+    trades = resolved.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_gain = np.where(resolved, gains, 0).sum(axis=0) / trades * 100
+        winrate = (resolved & (gains > 0)).sum(axis=0) / trades * 100
+        avg_bars = np.where(resolved, exit_steps - index["steps"][:, None, None], 0).sum(axis=0) / trades
+
+    n_pairs = len(sl_grid) * len(tp_grid)
+    capital, _, _ = _walk(index, gains.reshape(n_entries, n_pairs), exit_steps.reshape(n_entries, n_pairs),
+                          resolved.reshape(n_entries, n_pairs), (stopped & resolved).reshape(n_entries, n_pairs),
+                          cooldown_time)
+    total_gain = ((capital - 1) * 100).reshape(position.shape[1:])
+
+    def frame(values):
+        return pd.DataFrame(values, index=pd.Index(sl_grid, name="sl_mult"), columns=pd.Index(tp_grid, name="tp_mult"))
+    return {"total_gain": frame(total_gain), "avg_gain": frame(avg_gain), "winrate": frame(winrate),
+            "avg_bars": frame(avg_bars), "trades": frame(trades)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SL x TP outcome heatmap from one precomputed excursion index")
+    parser.add_argument("--range", type=int, default=BACKTEST_RANGE)
+    parser.add_argument("--horizon", type=int, help="longest trade to follow, in candles")
+    parser.add_argument("--cooldown", type=int, default=0)
+    parser.add_argument("--metric", default="total_gain", choices=["total_gain", "avg_gain", "winrate", "avg_bars",
+                                                                     "trades"])
+    parser.add_argument("--output", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    symbols = list(LAYER1_COINS.values())
+    coin_data = load_backtest_data(symbols)
+    if not coin_data:
+        return
+    _, arrays = prepare_arrays(coin_data, symbols, args.range)
+    start = time.perf_counter()
+    index = build_index(arrays, args.horizon)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    maps = heatmap(index, cooldown_time=args.cooldown)
+    print(f"🔎 Indexed {len(index['steps'])} entries in {built:.3f}s, "
+          f"{maps['total_gain'].size} SL x TP pairs in {time.perf_counter() - start:.3f}s")
+    pd.set_option("display.width", 250)
+    print(maps[args.metric].round(2).to_string())
+    pd.concat(maps, names=["metric"]).to_csv(args.output)
+    print(f"✅ Saved the heatmaps to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import numpy as np
+from kline_store import map_arrays, INTERVAL_MS
+
+AMBIGUOUS = ("stop", "target")
+
+
+class IntrabarExecution:
+    # SL/TP fills from each bar's high and low instead of its close. The levels are the engine's
+    # gain thresholds (take_profit and -stop_loss) turned into prices. When one bar touches both,
+    # lower-timeframe candles from the kline store decide which came first; without them, or when a
+    # single fine candle touches both too, `ambiguous` decides (the stop by default, the cautious choice).
+    def __init__(self, arrays, interval="1h", fine_interval="1m", ambiguous="stop", root=None):
+        if ambiguous not in AMBIGUOUS:
+            raise ValueError(f"Unknown ambiguous-bar rule {ambiguous!r}, expected one of {AMBIGUOUS}")
+        self.open, self.high, self.low = arrays["open"], arrays["high"], arrays["low"]
+        self.symbols = arrays["symbols"]
+        # Bar open times in ms, the kline store's timestamp unit
+        self.bar_start = np.asarray(arrays["index"], dtype="datetime64[ms]").view("i8")
+        self.bar_ms = INTERVAL_MS[interval]
+        self.fine_interval = fine_interval
+        self.ambiguous = ambiguous
+        self.root = root
+        self.fine = {}
+        self.resolved = 0
+        self.assumed = 0
+
+    def _fine(self, column):
+        # Memory-mapped, so only the candles inside a looked-up bar are ever read
+        if column not in self.fine:
+            self.fine[column] = map_arrays(self.symbols[column], self.fine_interval, self.root)
+        return self.fine[column]
+
+    def first_touch(self, i, column, tp_price, sl_price):
+        # "target" or "stop", whichever the fine candles inside bar i reach first
+        fine = self._fine(column)
+        timestamps = fine["timestamp"]
+        lo = np.searchsorted(timestamps, self.bar_start[i])
+        hi = np.searchsorted(timestamps, self.bar_start[i] + self.bar_ms)
+        target = np.asarray(fine["high"][lo:hi]) > tp_price
+        stop = np.asarray(fine["low"][lo:hi]) < sl_price
+        first_target = target.argmax() if target.any() else hi - lo
+        first_stop = stop.argmax() if stop.any() else hi - lo
+        if first_target == first_stop:
+            self.assumed += 1
+            return self.ambiguous
+        self.resolved += 1
+        return "target" if first_target < first_stop else "stop"
+
+    def exit(self, i, column, entry_price, take_profit, stop_loss):
+        # (fill price, "target" or "stop") when bar i touches a level, else None. A bar that opens
+        # past a level fills at its open.
+        tp_price = entry_price * (1 + take_profit)
+        sl_price = entry_price * (1 - stop_loss)
+        open_ = self.open[i, column]
+        if open_ > tp_price:
+            return open_, "target"
+        if open_ < sl_price:
+            return open_, "stop"
+        target = self.high[i, column] > tp_price
+        stop = self.low[i, column] < sl_price
+        if target and stop:
+            target = self.first_touch(i, column, tp_price, sl_price) == "target"
+        if target:
+            return tp_price, "target"
+        if stop:
+            return sl_price, "stop"
+        return None
@@ -1,41 +1,65 @@
-import requests
 import pandas as pd
 import time
-import pygame
 import os
 import pickle
-from config import LAYER1_COINS, WHITE, BLACK, GREEN, BINANCE_URL, BAR_X, BAR_Y, BAR_WIDTH, BAR_HEIGHT
-from concurrent.futures import ThreadPoolExecutor
+import json
+import threading
+from config import LAYER1_COINS, WHITE, BLACK, GREEN, BAR_X, BAR_Y, BAR_WIDTH, BAR_HEIGHT
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from market_client import MarketDataClient
+from resample import resample_ohlcv
+from kline_store import STORE_DIR, INTERVAL_MS, decode_klines, arrays_to_frame, append_klines, write_klines, last_timestamp, load_klines, stored_symbols
 
-session = requests.Session()
+client = MarketDataClient()
 
-def fetch_binance_ohlc(symbol, interval="1h", limit=1000):
+def fetch_binance_ohlc(symbol, interval="1h", limit=1000, start_time=None, end_time=None):
     pair = symbol + "USDT"
     params = {
         "symbol": pair,
         "interval": interval,
         "limit": limit
     }
-    response = session.get(BINANCE_URL, params=params)
-    if response.status_code != 200:
-        raise ValueError(f"Failed to fetch {pair}: {response.text}")
-    raw = response.json()
-    df = pd.DataFrame(raw, columns=[
-        "open_time", "open", "high", "low", "close", "volume",
-        "close_time", "quote_asset_volume", "trades", "taker_buy_base", "taker_buy_quote", "ignore"
-    ])
-    df = df[["open_time", "open", "high", "low", "close", "volume"]]
-    df.columns = ["timestamp", "open", "high", "low", "close", "volume"]
-    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-    df.set_index("timestamp", inplace=True)
-    df = df.astype(float)
-    return df
-
-
-def batch_fetch(symbols):
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        results = list(executor.map(fetch_binance_ohlc, symbols))
-    return results
+    if start_time:
+        params["startTime"] = int(start_time)
+    if end_time:
+        params["endTime"] = int(end_time)
+    return arrays_to_frame(decode_klines(client.get(params)))
+
+
+def fetch_incremental(symbol, interval="1h", limit=1000):
+    # Only candles after the last stored one are requested; closed candles are
+    # appended to the store and the still-forming one is returned but never stored.
+    step = INTERVAL_MS[interval]
+    last = last_timestamp(symbol, interval)
+    if last is None:
+        new = fetch_binance_ohlc(symbol, interval, limit)
+    else:
+        pages = []
+        start_time = last + step
+        while True:
+            page = fetch_binance_ohlc(symbol, interval, 1000, start_time=start_time)
+            pages.append(page)
+            if len(page) < 1000:
+                break
+            start_time = int(page.index.values[-1].astype("datetime64[ms]").astype("int64")) + step
+        new = pd.concat(pages)
+
+    now_ms = int(time.time() * 1000)
+    open_ms = new.index.values.astype("datetime64[ms]").astype("int64")
+    closed = open_ms + step <= now_ms
+    append_klines(symbol, interval, new[closed])
+
+    forming = new[~closed]
+    stored = load_klines(symbol, interval, tail=limit - len(forming))
+    return pd.concat([stored, forming]) if len(forming) else stored
+
+
+def batch_fetch(symbols, limit=1000):
+    # A failing symbol comes back as None instead of aborting the whole cycle
+    results, errors = client.fetch_many(lambda symbol: fetch_incremental(symbol, limit=limit), symbols)
+    for symbol, e in errors.items():
+        print(f"[ERROR] {symbol}: {e}")
+    return [results.get(symbol) for symbol in symbols]
 
 
 def fetch_all_binance_coins():
@@ -61,103 +85,167 @@ def fetch_binance_ohlc_range(symbol, interval="1h", start_time=None, end_time=No
     if end_time:
         params["endTime"] = int(end_time)
 
-    response = requests.get(BINANCE_URL, params=params)
-    if response.status_code != 200:
-        print(f"Error fetching {symbol} from {start_time} to {end_time}")
-        return []
-
-    raw = response.json()
-    if not raw:
-        return []
-
-    df = pd.DataFrame(raw, columns=[
-        "open_time", "open", "high", "low", "close", "volume",
-        "close_time", "quote_asset_volume", "trades", "taker_buy_base", "taker_buy_quote", "ignore"
-    ])
-    df = df[["open_time", "open", "high", "low", "close", "volume"]]
-    df.columns = ["timestamp", "open", "high", "low", "close", "volume"]
-    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-    df.set_index("timestamp", inplace=True)
-    df = df.astype(float)
-
-    return df.reset_index().to_dict("records")
+    try:
+        return decode_klines(client.get(params))
+    except Exception as e:
+        print(f"Error fetching {symbol} from {start_time} to {end_time}: {e}")
+        return decode_klines([])
+
+
+def _backfill_checkpoint_path(symbol, interval):
+    return os.path.join(STORE_DIR, interval, symbol, "backfill.json")
+
+
+def _load_backfill_checkpoint(symbol, interval):
+    path = _backfill_checkpoint_path(symbol, interval)
+    if not os.path.exists(path):
+        return {"done": [], "listed_after": None}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _save_backfill_checkpoint(symbol, interval, checkpoint):
+    path = _backfill_checkpoint_path(symbol, interval)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+
+def backfill_history(symbols, total_candles, interval="1h", on_progress=None, max_workers=8):
+    # Windows are aligned to multiples of 1000 candles since the epoch, so they keep
+    # the same boundaries between runs and completed ones can be skipped on resume.
+    step = INTERVAL_MS[interval]
+    span = 1000 * step
+    now_ms = int(time.time() * 1000)
+    first_window = (now_ms - total_candles * step) // span
+    last_window = now_ms // span
+
+    checkpoints = {}
+    tasks = []
+    for symbol in symbols:
+        checkpoint = _load_backfill_checkpoint(symbol, interval)
+        checkpoints[symbol] = checkpoint
+        done = set(checkpoint["done"])
+        listed_after = checkpoint["listed_after"]
+        for window in range(last_window, first_window - 1, -1):
+            if window in done or (listed_after is not None and window < listed_after):
+                continue
+            tasks.append((symbol, window))
+
+    locks = {symbol: threading.Lock() for symbol in symbols}
+
+    # Request weight is rationed by the shared client, so the pool size only bounds latency
+    def fetch_window(symbol, window):
+        start_time = window * span
+        df = fetch_binance_ohlc(symbol, interval, 1000, start_time=start_time, end_time=start_time + span - 1)
+        df = df[df.index.values.astype("datetime64[ms]").astype("int64") + step <= now_ms]
+        with locks[symbol]:
+            checkpoint = checkpoints[symbol]
+            if len(df):
+                write_klines(symbol, interval, df)
+            elif window < last_window:
+                # Nothing before the listing date; older windows are empty too
+                checkpoint["listed_after"] = max(checkpoint["listed_after"] or window, window)
+            # The window holding the current candle is only complete once it has passed
+            if (window + 1) * span <= now_ms:
+                checkpoint["done"].append(window)
+            _save_backfill_checkpoint(symbol, interval, checkpoint)
+        return len(df)
+
+    completed = 0
+    failures = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch_window, symbol, window): (symbol, window) for symbol, window in tasks}
+        for future in as_completed(futures):
+            symbol, window = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                failures.setdefault(symbol, []).append(window)
+                print(f"[ERROR] {symbol} window {window}: {e}")
+            completed += 1
+            if on_progress:
+                on_progress(completed, len(tasks), symbol)
+    return failures
 
 
 def generate_backtest_data(screen, total_candles_per_coin):
+    # Imported here so headless tools can use the fetcher on machines without a display
+    import pygame
     pygame.display.set_caption("Generating Backtest Data")
-    clock = pygame.time.Clock()
     font = pygame.font.SysFont("arial", 22)
 
-    total_batches = 0
-    batch_counts = {}
-    for symbol in LAYER1_COINS.values():
-        batch_count = (total_candles_per_coin + 999) // 1000
-        batch_counts[symbol] = batch_count
-        total_batches += batch_count
-
-    completed_batches = 0
-    coin_data = {}
-
-    for coin_name, symbol in LAYER1_COINS.items():
-        batch_count = batch_counts[symbol]
-        coin_batches = []
-
-        end_time = int(time.time() * 1000)  # current time in ms
-        for batch in range(batch_count):
-            # Draw progress
-            screen.fill(WHITE)
-            header = font.render("Fetching Data", True, BLACK)
-            width = header.get_width()
-            screen.blit(header, ((screen.get_size()[0] / 2) - (width / 2), 50))
-            progress = completed_batches / total_batches
-            pygame.draw.rect(screen, (100, 100, 100), (BAR_X, BAR_Y, BAR_WIDTH, BAR_HEIGHT))
-            pygame.draw.rect(screen, GREEN, (BAR_X, BAR_Y, int(BAR_WIDTH * progress), BAR_HEIGHT))
-
-            status_text = f"{symbol} [{batch + 1}/{batch_count}]"
-            msg_surface = font.render(status_text, True, BLACK)
-            screen.blit(msg_surface, (BAR_X, BAR_Y - 40))
-
-            percent_text = font.render(f"{int(progress * 100)}%", True, BLACK)
-            screen.blit(percent_text, (BAR_X + BAR_WIDTH // 2 - 20, BAR_Y + 5))
-
-            pygame.display.flip()
-            start_time = end_time - 1000 * 60 * 60 * 1000  # 1000 hours earlier in ms
-            data = fetch_binance_ohlc_range(symbol, interval='1h', start_time=start_time, end_time=end_time, limit=1000)
-
-            if not data or len(data) < 10:
-                print(f"{symbol} has no more data beyond batch {batch + 1}")
-                break  # reached historical limit
-
-            coin_batches = data + coin_batches  # prepend to maintain order
-            end_time = start_time
-            completed_batches += 1
-            clock.tick(30)
-        coin_data[symbol] = coin_batches
-    save_backtest_data(coin_data)
-
-
-def save_backtest_data(data, filename="backtest_data.pkl"):
-    with open(filename, "wb") as f:
-        pickle.dump(data, f)
-    print(f"✅ Data saved to {filename}")
-
-
-def load_backtest_data(filename="backtest_data.pkl"):
+    def draw_progress(completed, total, symbol):
+        screen.fill(WHITE)
+        header = font.render("Fetching Data", True, BLACK)
+        width = header.get_width()
+        screen.blit(header, ((screen.get_size()[0] / 2) - (width / 2), 50))
+        progress = completed / total
+        pygame.draw.rect(screen, (100, 100, 100), (BAR_X, BAR_Y, BAR_WIDTH, BAR_HEIGHT))
+        pygame.draw.rect(screen, GREEN, (BAR_X, BAR_Y, int(BAR_WIDTH * progress), BAR_HEIGHT))
+
+        status_text = f"{symbol} [{completed}/{total}]"
+        msg_surface = font.render(status_text, True, BLACK)
+        screen.blit(msg_surface, (BAR_X, BAR_Y - 40))
+
+        percent_text = font.render(f"{int(progress * 100)}%", True, BLACK)
+        screen.blit(percent_text, (BAR_X + BAR_WIDTH // 2 - 20, BAR_Y + 5))
+
+        pygame.display.flip()
+        pygame.event.pump()
+
+    failures = backfill_history(list(LAYER1_COINS.values()), total_candles_per_coin, on_progress=draw_progress)
+    if failures:
+        print(f"⚠️ Backfill incomplete for {', '.join(failures)}; run it again to resume")
+    else:
+        print(f"✅ Data saved to {STORE_DIR}")
+
+
+def save_backtest_data(data, interval="1h"):
+    for symbol, candles in data.items():
+        if candles is None or len(candles) == 0:
+            continue
+        df = candles if isinstance(candles, pd.DataFrame) else pd.DataFrame(candles)
+        write_klines(symbol, interval, df)
+    print(f"✅ Data saved to {STORE_DIR}")
+
+
+def migrate_backtest_pickle(filename="backtest_data.pkl", interval="1h"):
+    # Older versions pickled {symbol: [candle dicts]}; copy it into the kline store once
+    marker = os.path.join(STORE_DIR, interval, ".migrated_" + os.path.basename(filename))
     if not os.path.exists(filename):
-        print("❌ No saved backtest data found.")
-        return None
+        return
+    if os.path.exists(marker) and os.path.getmtime(marker) >= os.path.getmtime(filename):
+        return
 
     with open(filename, "rb") as f:
         raw_data = pickle.load(f)
+    save_backtest_data(raw_data, interval)
+    os.makedirs(os.path.dirname(marker), exist_ok=True)
+    with open(marker, "w") as f:
+        f.write(filename)
+
+
+def load_backtest_data(symbols=None, start=None, end=None, interval="1h", filename="backtest_data.pkl",
+                       base_interval="1h"):
+    migrate_backtest_pickle(filename, base_interval)
+    # Higher timeframes that were never fetched are built locally from the base candles
+    source_interval = interval if stored_symbols(interval) else base_interval
+    available = stored_symbols(source_interval)
+    if not available:
+        print("❌ No saved backtest data found.")
+        return None
 
+    # Only the requested symbols and date range are read out of the memory-mapped columns
+    symbols = available if symbols is None else [s for s in symbols if s in available]
     formatted_data = {}
-    for symbol, candles in raw_data.items():
-        if not candles:
-            continue
-        df = pd.DataFrame(candles)
-        df.set_index("timestamp", inplace=True)
-        df = df.astype(float)
-        formatted_data[symbol] = df
-
-    print(f"✅ Loaded and parsed backtest data from {filename}")
+    for symbol in symbols:
+        df = load_klines(symbol, source_interval, start=start, end=end)
+        if source_interval != interval:
+            df = resample_ohlcv(df, interval, source_interval)
+        if len(df):
+            formatted_data[symbol] = df
+
+    print(f"✅ Loaded backtest data for {len(formatted_data)} symbols from {STORE_DIR}")
     return formatted_data
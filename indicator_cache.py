@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+import pandas as pd
+from indicators import INDICATORS, resolve
+from indicator_panel import panel_indicator_frames
+
+CACHE_DIR = "indicator_cache"
+# Pickles kept on disk; the least recently used go first
+DISK_ENTRIES = 256
+
+
+def params_fingerprint(columns, overrides=None):
+    # Covers every indicator the columns depend on, so changing any parameter misses the cache
+    overrides = overrides or {}
+    params = {name: {**INDICATORS[name].params, **overrides.get(name, {})} for name in resolve(columns)}
+    payload = json.dumps({"columns": sorted(columns), "params": params}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def cache_key(symbol, interval, df, columns, params=None):
+    first = str(df.index[0]) if len(df) else None
+    last = str(df.index[-1]) if len(df) else None
+    return symbol, interval, first, last, len(df), params_fingerprint(columns, params)
+
+
+class IndicatorCache:
+    def __init__(self, max_entries=256, disk_dir=None, max_disk_entries=DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _disk_name(self, key):
+        # <series>_<last candle>_<key>.pkl, where a series is one symbol, interval and parameter set,
+        # so a put can find the files it makes stale
+        symbol, interval, last, params = key[0], key[1], key[3], key[5]
+        series = hashlib.sha1(repr((symbol, interval, params)).encode()).hexdigest()[:16]
+        last = pd.Timestamp(last).value if last is not None else 0
+        return series, last, f"{series}_{last}_{hashlib.sha1(repr(key).encode()).hexdigest()}.pkl"
+
+    def _load(self, key):
+        path = os.path.join(self.disk_dir, self._disk_name(key)[2])
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Could not read cached indicators {path}: {e}")
+            return None
+        return value
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        value = self._load(key) if self.disk_dir else None
+        if value is not None:
+            self._remember(key, value)
+            with self.lock:
+                self.disk_hits += 1
+            return value
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            series, last, name = self._disk_name(key)
+            path = os.path.join(self.disk_dir, name)
+            # Per-process temp name, optimizer workers can write the same key at once
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self._evict(series, last)
+
+    def _evict(self, series, last):
+        # Drops the series' files for older candles (and files named before series existed), then
+        # the least recently used beyond the cap
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".pkl"):
+                continue
+            parts = name[:-len(".pkl")].split("_")
+            path = os.path.join(self.disk_dir, name)
+            try:
+                if len(parts) != 3 or parts[0] == series and int(parts[1]) < last:
+                    os.remove(path)
+                else:
+                    files.append((os.path.getmtime(path), path))
+            except (OSError, ValueError):
+                continue
+        files.sort()
+        for _, path in files[:max(len(files) - self.max_disk_entries, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _remember(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "entries": len(self.entries)}
+
+
+cache = IndicatorCache(disk_dir=CACHE_DIR)
+
+
+def cached_indicator_frames(coin_data, symbols, columns, interval="1h", indicator_cache=cache, params=None):
+    # Per-symbol indicator frames; only symbols whose candles or parameters changed go through the panel.
+    # Each is computed from its own candles alone (see panel_indicator_frames), so an entry depends only
+    # on what its key describes, not on which other symbols missed the cache in the same call.
+    frames = {}
+    keys = {}
+    for symbol in symbols:
+        if symbol not in coin_data:
+            continue
+        keys[symbol] = cache_key(symbol, interval, coin_data[symbol], columns, params)
+        df = indicator_cache.get(keys[symbol])
+        if df is not None:
+            frames[symbol] = df.copy()
+    missing = [symbol for symbol in keys if symbol not in frames]
+    if missing:
+        computed = panel_indicator_frames(coin_data, missing, columns, params=params)
+        for symbol in missing:
+            indicator_cache.put(keys[symbol], computed[symbol])
+            frames[symbol] = computed[symbol].copy()
+    return frames
@@ -0,0 +1,223 @@
+import copy
+import math
+from collections import deque
+import pandas as pd
+from indicators import INDICATORS
+from rolling import RollingExtreme, RollingStats, scalar_ratio
+from swings import SwingState
+
+INDICATOR_COLUMNS = [
+    "rsi", "atr", "rsi_5", "ma_20", "rsi_down_3", "rsi_below_60_3d", "rsi_signal_buy", "rsi_signal_sell",
+    "swing_high", "swing_low", "trend",
+    "stoch_k", "stoch_d", "bb_pct", "stoch_signal_buy", "stoch_signal_sell", "bb_signal_buy", "bb_signal_sell"
+]
+
+
+class RollingMean:
+    # Same compensated running sum pandas uses for rolling().mean(), one value at a time,
+    # so the results match indicators.py bit for bit
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.nobs = 0
+        self.sum = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.neg_ct = 0
+        self.same_ct = 0
+        self.prev = math.nan
+
+    def _add(self, value):
+        if math.isnan(value):
+            return
+        self.nobs += 1
+        y = value - self.compensation_add
+        t = self.sum + y
+        self.compensation_add = t - self.sum - y
+        self.sum = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct += 1
+        if value == self.prev:
+            self.same_ct += 1
+        else:
+            self.same_ct = 1
+        self.prev = value
+
+    def _remove(self, value):
+        if math.isnan(value):
+            return
+        self.nobs -= 1
+        y = -value - self.compensation_remove
+        t = self.sum + y
+        self.compensation_remove = t - self.sum - y
+        self.sum = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct -= 1
+
+    def push(self, value):
+        if len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self.values.append(value)
+        self._add(value)
+        if self.nobs < self.window:
+            return math.nan
+        if self.same_ct >= self.nobs:
+            return self.prev
+        result = self.sum / self.nobs
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == self.nobs and result > 0:
+            return 0.0
+        return result
+
+
+def _rsi(gain, loss):
+    if math.isnan(gain) or math.isnan(loss) or (gain == 0 and loss == 0):
+        return math.nan
+    if loss == 0:
+        return 100.0
+    return 100 - (100 / (1 + gain / loss))
+
+
+class RSIState:
+    def __init__(self, period):
+        self.gain = RollingMean(period)
+        self.loss = RollingMean(period)
+        self.prev_close = math.nan
+
+    def push(self, close):
+        delta = close - self.prev_close
+        self.prev_close = close
+        if math.isnan(delta):
+            gain = loss = math.nan
+        else:
+            # Series.clip keeps the sign pandas sees: losses are -0.0 when price rose
+            gain = max(delta, 0.0)
+            loss = -min(delta, 0.0)
+        return _rsi(self.gain.push(gain), self.loss.push(loss))
+
+
+def indicator_params(overrides=None):
+    # Parameters of every registered indicator, with overrides per indicator like compute_indicators
+    # takes them. The engine reads the same entries the cache and checkpoint fingerprints hash.
+    overrides = overrides or {}
+    return {name: {**INDICATORS[name].params, **overrides.get(name, {})} for name in INDICATOR_COLUMNS}
+
+
+class IndicatorState:
+    def __init__(self, params=None):
+        p = indicator_params(params)
+        self.params = p
+        self.rsi = RSIState(p["rsi"]["period"])
+        self.short_rsi = RSIState(p["rsi_5"]["period"])
+        self.atr = RollingMean(p["atr"]["period"])
+        self.ma = RollingMean(p["ma_20"]["window"])
+        self.prev_close = math.nan
+        down_days = p["rsi_down_3"]["days"]
+        self.recent_short_rsi = deque([math.nan] * (down_days + 1), maxlen=down_days + 1)
+        self.below_60 = deque(maxlen=p["rsi_below_60_3d"]["days"])
+        # One swing scan feeds swing_high, swing_low and trend, with the trend's parameters
+        swings = p["trend"]
+        self.swings = SwingState(swings["swing_range"], swings["look_back"], swings["tolerance"])
+        self.stoch_high = RollingExtreme(p["stoch_k"]["period"], 1)
+        self.stoch_low = RollingExtreme(p["stoch_k"]["period"], -1)
+        self.stoch_d = RollingStats(p["stoch_d"]["window"])
+        self.bb = RollingStats(p["bb_pct"]["window"])
+        self.bb_std = p["bb_pct"]["num_std"]
+
+    def update(self, candle):
+        high, low, close = candle["high"], candle["low"], candle["close"]
+        p = self.params
+
+        ranges = [high - low, abs(high - self.prev_close), abs(low - self.prev_close)]
+        true_range = max((r for r in ranges if not math.isnan(r)), default=math.nan)
+        self.prev_close = close
+
+        rsi_5 = self.short_rsi.push(close)
+        ma_20 = self.ma.push(close)
+        self.recent_short_rsi.append(rsi_5)
+        recent = list(reversed(self.recent_short_rsi))
+        rsi_down_3 = all(newer < older for newer, older in zip(recent, recent[1:]))
+        self.below_60.append(rsi_5 < p["rsi_below_60_3d"]["level"])
+        rsi_below_60_3d = len(self.below_60) == self.below_60.maxlen and all(self.below_60)
+
+        lowest = self.stoch_low.push(low)
+        stoch_k = 100 * scalar_ratio(close - lowest, self.stoch_high.push(high) - lowest)
+        stoch_d = self.stoch_d.push(stoch_k)[0]
+        mean, var = self.bb.push(close)
+        band = self.bb_std * math.sqrt(var)
+        bb_pct = scalar_ratio(close - (mean - band), 2 * band)
+
+        return {
+            "rsi": self.rsi.push(close),
+            "atr": self.atr.push(true_range),
+            "rsi_5": rsi_5,
+            "ma_20": ma_20,
+            "rsi_down_3": rsi_down_3,
+            "rsi_below_60_3d": rsi_below_60_3d,
+            "rsi_signal_buy": (rsi_5 < p["rsi_signal_buy"]["oversold"] and rsi_down_3 and rsi_below_60_3d and
+                               close > ma_20),
+            "rsi_signal_sell": rsi_5 > p["rsi_signal_sell"]["level"],
+            "stoch_k": stoch_k,
+            "stoch_d": stoch_d,
+            "bb_pct": bb_pct,
+            "stoch_signal_buy": stoch_k < p["stoch_signal_buy"]["level"] and stoch_k > stoch_d,
+            "stoch_signal_sell": stoch_k > p["stoch_signal_sell"]["level"] and stoch_k < stoch_d,
+            "bb_signal_buy": bb_pct < p["bb_signal_buy"]["level"],
+            "bb_signal_sell": bb_pct > p["bb_signal_sell"]["level"],
+            **self.swings.update(high, low),
+        }
+
+
+class IndicatorEngine:
+    # params overrides registered indicator parameters, e.g. {"rsi_5": {"period": 7}}
+    def __init__(self, history=1000, params=None):
+        self.history = history
+        self.params = params
+        self.states = {}
+        self.last_timestamp = {}
+        self.frames = {}
+
+    def update(self, symbol, timestamp, candle):
+        # Constant-time step for one new candle; returns None for candles already seen
+        last = self.last_timestamp.get(symbol)
+        if last is not None and timestamp <= last:
+            return None
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = IndicatorState(self.params)
+        self.last_timestamp[symbol] = timestamp
+        return state.update(candle)
+
+    def append(self, symbol, df):
+        # Feeds candles newer than the last one seen for the symbol and returns their indicator rows
+        last = self.last_timestamp.get(symbol)
+        if last is not None:
+            df = df[df.index > last]
+        candles = df[["high", "low", "close"]].to_dict("records")
+        rows = [self.update(symbol, timestamp, candle) for timestamp, candle in zip(df.index, candles)]
+        indicators = pd.DataFrame(rows, index=df.index, columns=INDICATOR_COLUMNS)
+        return pd.concat([df, indicators], axis=1)
+
+    def frame(self, symbol, df, forming_last=False):
+        # Indicator frame for the screener: new closed candles are folded into the state once,
+        # a still-forming last candle is evaluated on a copy and never committed
+        closed = df.iloc[:-1] if forming_last else df
+        new_rows = self.append(symbol, closed)
+        previous = self.frames.get(symbol)
+        frame = new_rows if previous is None else pd.concat([previous, new_rows])
+        frame = frame.iloc[-self.history:]
+        self.frames[symbol] = frame
+        if not forming_last or not len(df):
+            return frame
+
+        forming = df.iloc[-1:]
+        state = copy.deepcopy(self.states.get(symbol) or IndicatorState(self.params))
+        row = state.update(forming[["high", "low", "close"]].iloc[0].to_dict())
+        forming = pd.concat([forming, pd.DataFrame([row], index=forming.index, columns=INDICATOR_COLUMNS)], axis=1)
+        return pd.concat([frame, forming])
+
+    def reset(self, symbol):
+        self.states.pop(symbol, None)
+        self.last_timestamp.pop(symbol, None)
+        self.frames.pop(symbol, None)
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+from indicators import INDICATORS, resolve, stochastic, bollinger_pct
+from rolling import rolling_mean, rolling_sum
+from swings import swing_columns
+
+PRICE_FIELDS = ["open", "high", "low", "close", "volume"]
+# Size of one block of symbols' values in add_indicators_panel
+BLOCK_BYTES = 256 * 1024
+
+
+# Panels are dicts of time x symbol DataFrames, one per field. Indicators are computed on
+# the underlying 2D arrays, so every symbol goes through the same NumPy pass. All symbols of
+# a panel share one index: aligning different candles on a common index would put NaN rows
+# inside a symbol's own series, and every window over them would differ from its own result.
+def build_panel(coin_data, symbols=None, fields=PRICE_FIELDS):
+    symbols = list(coin_data) if symbols is None else [s for s in symbols if s in coin_data]
+    index = coin_data[symbols[0]].index
+    for symbol in symbols[1:]:
+        if not coin_data[symbol].index.equals(index):
+            raise ValueError(f"{symbol} has different candles than {symbols[0]}, see panel_groups")
+    panel = {}
+    for field in fields:
+        # Symbol-major storage: each symbol's series is contiguous, which is also how the
+        # DataFrame keeps it, so no transposed copy is made on either side
+        values = np.empty((len(symbols), len(index)))
+        for i, symbol in enumerate(symbols):
+            values[i] = coin_data[symbol][field].to_numpy(dtype=float)
+        panel[field] = pd.DataFrame(values.T, index=index, columns=symbols, copy=False)
+    return panel
+
+
+def panel_groups(coin_data, symbols=None):
+    # Symbols with identical candle timestamps, each group in symbol order
+    symbols = list(coin_data) if symbols is None else [s for s in symbols if s in coin_data]
+    groups = {}
+    for symbol in symbols:
+        index = coin_data[symbol].index
+        key = (len(index), index[0], index[-1]) if len(index) else (0,)
+        for group in groups.setdefault(key, []):
+            if coin_data[group[0]].index.equals(index):
+                group.append(symbol)
+                break
+        else:
+            groups[key].append([symbol])
+    return [group for candidates in groups.values() for group in candidates]
+
+
+def _shift(values, periods=1):
+    shifted = np.full_like(values, np.nan)
+    shifted[periods:] = values[:-periods]
+    return shifted
+
+
+def panel_rsi(close, period):
+    delta = close - _shift(close)
+    # np.maximum keeps NaN, like Series.clip
+    gain = rolling_mean(np.maximum(delta, 0.0), period)
+    loss = rolling_mean(np.maximum(-delta, 0.0), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - (100 / (1 + gain / loss))
+
+
+def panel_atr(high, low, close, period):
+    prev_close = _shift(close)
+    # fmax skips NaN like DataFrame.max(axis=1) does on the first row
+    tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+    return rolling_mean(tr, period)
+
+
+def _rsi_down(rsi_5, days):
+    down = rsi_5 < _shift(rsi_5, 1)
+    for day in range(1, days):
+        down &= _shift(rsi_5, day) < _shift(rsi_5, day + 1)
+    return down
+
+
+def _swing_column(cols, column, **params):
+    # Swings are a sequential scan, so this one runs symbol by symbol
+    high, low = cols["high"], cols["low"]
+    out = np.empty(high.shape, dtype=np.int8 if column == "trend" else float)
+    for i in range(high.shape[1]):
+        out[:, i] = swing_columns(high[:, i], low[:, i], **params)[column]
+    return out
+
+
+# Array versions of the indicators registered in indicators.py, taking the same parameters
+PANEL_KERNELS = {
+    "rsi": lambda cols, period: panel_rsi(cols["close"], period),
+    "atr": lambda cols, period: panel_atr(cols["high"], cols["low"], cols["close"], period),
+    "rsi_5": lambda cols, period: panel_rsi(cols["close"], period),
+    "ma_20": lambda cols, window: rolling_mean(cols["close"], window),
+    "rsi_down_3": lambda cols, days: _rsi_down(cols["rsi_5"], days),
+    "rsi_below_60_3d": lambda cols, level, days: rolling_sum((cols["rsi_5"] < level).astype(float), days) >= days,
+    "rsi_signal_buy": lambda cols, oversold: (
+        (cols["rsi_5"] < oversold) & cols["rsi_down_3"] & cols["rsi_below_60_3d"] & (cols["close"] > cols["ma_20"])
+    ),
+    "rsi_signal_sell": lambda cols, level: cols["rsi_5"] > level,
+    "stoch_k": lambda cols, period: stochastic(cols["high"], cols["low"], cols["close"], period),
+    "stoch_d": lambda cols, window: rolling_mean(cols["stoch_k"], window),
+    "bb_pct": lambda cols, window, num_std: bollinger_pct(cols["close"], window, num_std),
+    "stoch_signal_buy": lambda cols, level: (cols["stoch_k"] < level) & (cols["stoch_k"] > cols["stoch_d"]),
+    "stoch_signal_sell": lambda cols, level: (cols["stoch_k"] > level) & (cols["stoch_k"] < cols["stoch_d"]),
+    "bb_signal_buy": lambda cols, level: cols["bb_pct"] < level,
+    "bb_signal_sell": lambda cols, level: cols["bb_pct"] > level,
+    "swing_high": lambda cols, **params: _swing_column(cols, "swing_high", **params),
+    "swing_low": lambda cols, **params: _swing_column(cols, "swing_low", **params),
+    "trend": lambda cols, **params: _swing_column(cols, "trend", **params),
+}
+
+
+def add_indicators_panel(panel, columns=None, chunk=None, params=None):
+    # Only the requested columns and what they depend on are computed; params overrides
+    # registered parameters per indicator like compute_indicators
+    names = list(INDICATORS) if columns is None else resolve(columns)
+    params = params or {}
+    inputs = [field for field in PRICE_FIELDS if field in panel]
+    # Time x symbol arrays laid out symbol by symbol (Fortran order), like the panel frames hold them
+    values = {field: np.asfortranarray(panel[field].to_numpy(dtype=float)) for field in inputs}
+    n_rows, n_symbols = panel["close"].shape
+
+    # Symbols are processed in column blocks small enough for every intermediate to stay in
+    # cache, so fewer symbols per block on longer histories; each block still goes through the
+    # vectorized path as a whole
+    chunk = chunk or max(1, BLOCK_BYTES // (8 * max(n_rows, 1)))
+    outputs = {}
+    for start in range(0, n_symbols, chunk):
+        block = slice(start, start + chunk)
+        cols = {field: values[field][:, block] for field in inputs}
+        for name in names:
+            cols[name] = PANEL_KERNELS[name](cols, **{**INDICATORS[name].params, **params.get(name, {})})
+            if name not in outputs:
+                outputs[name] = np.empty((n_symbols, n_rows), dtype=cols[name].dtype)
+            outputs[name][block] = cols[name].T
+
+    result = dict(panel)
+    for name in names:
+        result[name] = pd.DataFrame(outputs[name].T, index=panel["close"].index, columns=panel["close"].columns,
+                                    copy=False)
+    return result
+
+
+def panel_frames(panel, symbols=None, fields=PRICE_FIELDS):
+    # Per-symbol frames shaped like add_indicators output. Their columns are views of the panel's
+    # symbol-major arrays; consolidating them into one block per frame would copy every value again.
+    names = list(panel["close"].columns)
+    symbols = names if symbols is None else symbols
+    columns = [field for field in fields if field in panel] + [c for c in INDICATORS if c in panel]
+    arrays = {column: panel[column].to_numpy().T for column in columns}
+    index = panel["close"].index
+    frames = {}
+    for symbol in symbols:
+        i = names.index(symbol)
+        frames[symbol] = pd.DataFrame({column: arrays[column][i] for column in columns}, index=index, copy=False)
+    return frames
+
+
+def panel_indicator_frames(coin_data, symbols=None, columns=None, params=None):
+    # Per-symbol indicator frames, one panel per group of symbols sharing their candles, so a
+    # symbol's result doesn't depend on which other symbols it is computed with
+    frames = {}
+    for group in panel_groups(coin_data, symbols):
+        frames.update(panel_frames(add_indicators_panel(build_panel(coin_data, group), columns, params=params)))
+    return frames
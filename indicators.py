@@ -1,73 +1,237 @@
 import numpy as np
-from config import TREND_TOLERANCE, SWINGS_LOOK_BACK, SWING_RANGE, ATR_MULT
+from config import TREND_TOLERANCE, SWINGS_LOOK_BACK, SWING_RANGE, ATR_MULT, BUY_STOCH, SELL_STOCH, BUY_BP, SELL_BP
 import pandas as pd
-from scipy.signal import argrelextrema
+from swings import swing_columns
+from rolling import rolling_max, rolling_min, rolling_mean, rolling_mean_var, ratio
 
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
 
-def add_indicators(df):
+# Registered indicators, in registration order. Inputs have to be registered first,
+# so this order is also a valid computation order.
+INDICATORS = {}
+
+
+class Indicator:
+    def __init__(self, name, func, inputs, params, warmup):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.params = params
+        self.warmup = warmup
+
+    def own_warmup(self):
+        # Rows this indicator needs on top of its inputs before its first valid value
+        return self.warmup(**self.params) if callable(self.warmup) else self.warmup
+
+    def compute(self, df, **overrides):
+        return self.func(df, **{**self.params, **overrides})
+
+
+def register_indicator(name, inputs, warmup=0, **params):
+    for column in inputs:
+        if column not in PRICE_COLUMNS and column not in INDICATORS:
+            raise ValueError(f"{name} depends on unknown column {column}")
+
+    def decorator(func):
+        INDICATORS[name] = Indicator(name, func, inputs, params, warmup)
+        return func
+    return decorator
+
+
+def resolve(columns):
+    needed = set()
+    stack = list(columns)
+    while stack:
+        name = stack.pop()
+        if name in PRICE_COLUMNS or name in needed:
+            continue
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator {name}")
+        needed.add(name)
+        stack.extend(INDICATORS[name].inputs)
+    return [name for name in INDICATORS if name in needed]
+
+
+def warmup_length(columns):
+    lengths = {}
+    for name in resolve(columns):
+        indicator = INDICATORS[name]
+        lengths[name] = indicator.own_warmup() + max((lengths[i] for i in indicator.inputs if i in lengths), default=0)
+    return max((lengths[c] for c in columns if c in lengths), default=0)
+
+
+def required_history(columns):
+    # Candles a symbol needs so the last row of every column is valid
+    return warmup_length(columns) + 1
+
+
+def compute_indicators(df, columns=None, params=None):
+    # params overrides registered parameters per indicator, e.g. {"rsi_5": {"period": 7}}
+    names = list(INDICATORS) if columns is None else resolve(columns)
+    params = params or {}
     df = df.copy()
-    df = add_rsi(df)
-    df = add_atr(df)
-    df = add_short_rsi_indicator(df)
+    for name in names:
+        df[name] = INDICATORS[name].compute(df, **params.get(name, {}))
     return df
 
 
-def add_rsi(df, period=14):
-    delta = df["close"].diff()
+def add_indicators(df):
+    return compute_indicators(df)
+
+
+def rsi(close, period):
+    delta = close.diff()
     gain = delta.clip(lower=0).rolling(window=period).mean()
     loss = -delta.clip(upper=0).rolling(window=period).mean()
     rs = gain / loss
-    df["rsi"] = 100 - (100 / (1 + rs))
-    return df
+    return 100 - (100 / (1 + rs))
 
 
-def add_short_rsi_indicator(df, period=5):
-    df = df.copy()
+def atr(high, low, close, period):
+    tr1 = high - low
+    tr2 = (high - close.shift(1)).abs()
+    tr3 = (low - close.shift(1)).abs()
 
-    # Calculate 5-day RSI
-    delta = df["close"].diff()
-    gain = delta.clip(lower=0).rolling(window=period).mean()
-    loss = -delta.clip(upper=0).rolling(window=period).mean()
-    rs = gain / loss
-    df["rsi_5"] = 100 - (100 / (1 + rs))
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    return tr.rolling(window=period).mean()
 
-    # 20-day moving average
-    df["ma_20"] = df["close"].rolling(20).mean()
 
-    # RSI decreasing 3 days in a row
-    df["rsi_down_3"] = (
-        (df["rsi_5"] < df["rsi_5"].shift(1)) &
-        (df["rsi_5"].shift(1) < df["rsi_5"].shift(2)) &
-        (df["rsi_5"].shift(2) < df["rsi_5"].shift(3))
-    )
+@register_indicator("rsi", ["close"], warmup=lambda period: period, period=14)
+def _rsi(df, period):
+    return rsi(df["close"], period)
+
+
+@register_indicator("atr", ["high", "low", "close"], warmup=lambda period: period - 1, period=14)
+def _atr(df, period):
+    return atr(df["high"], df["low"], df["close"], period)
+
+
+# Calculate 5-day RSI
+@register_indicator("rsi_5", ["close"], warmup=lambda period: period, period=5)
+def _rsi_5(df, period):
+    return rsi(df["close"], period)
+
+
+# 20-day moving average
+@register_indicator("ma_20", ["close"], warmup=lambda window: window - 1, window=20)
+def _ma_20(df, window):
+    return df["close"].rolling(window).mean()
+
+
+# RSI decreasing 3 days in a row
+@register_indicator("rsi_down_3", ["rsi_5"], warmup=lambda days: days, days=3)
+def _rsi_down_3(df, days):
+    rsi_5 = df["rsi_5"]
+    down = rsi_5 < rsi_5.shift(1)
+    for day in range(1, days):
+        down = down & (rsi_5.shift(day) < rsi_5.shift(day + 1))
+    return down
+
 
-    # RSI below 60 for at least 3 days
-    rsi_below_60 = df["rsi_5"] < 60
-    df["rsi_below_60_3d"] = rsi_below_60.rolling(3).sum() >= 3
+# RSI below 60 for at least 3 days
+@register_indicator("rsi_below_60_3d", ["rsi_5"], warmup=lambda level, days: days - 1, level=60, days=3)
+def _rsi_below_60_3d(df, level, days):
+    rsi_below = df["rsi_5"] < level
+    return rsi_below.rolling(days).sum() >= days
 
-    df["rsi_signal_buy"] = (
-        (df["rsi_5"] < 30) &
+
+@register_indicator("rsi_signal_buy", ["rsi_5", "rsi_down_3", "rsi_below_60_3d", "close", "ma_20"], oversold=30)
+def _rsi_signal_buy(df, oversold):
+    return (
+        (df["rsi_5"] < oversold) &
         (df["rsi_down_3"]) &
         (df["rsi_below_60_3d"]) &
         (df["close"] > df["ma_20"])
     )
 
-    df["rsi_signal_sell"] = df["rsi_5"] > 50
 
-    return df
+@register_indicator("rsi_signal_sell", ["rsi_5"], level=50)
+def _rsi_signal_sell(df, level):
+    return df["rsi_5"] > level
 
-def add_atr(df, period=14):
-    df = df.copy()
-    high = df["high"]
-    low = df["low"]
-    close = df["close"]
 
-    tr1 = high - low
-    tr2 = (high - close.shift(1)).abs()
-    tr3 = (low - close.shift(1)).abs()
+# Last confirmed swing levels and the trend they form, see swings.py
+@register_indicator("swing_high", ["high", "low"], warmup=lambda swing_range, **_: 2 * swing_range,
+                    swing_range=SWING_RANGE, look_back=SWINGS_LOOK_BACK, tolerance=TREND_TOLERANCE)
+def _swing_high(df, swing_range, look_back, tolerance):
+    return swing_columns(df["high"], df["low"], swing_range, look_back, tolerance)["swing_high"]
+
+
+@register_indicator("swing_low", ["high", "low"], warmup=lambda swing_range, **_: 2 * swing_range,
+                    swing_range=SWING_RANGE, look_back=SWINGS_LOOK_BACK, tolerance=TREND_TOLERANCE)
+def _swing_low(df, swing_range, look_back, tolerance):
+    return swing_columns(df["high"], df["low"], swing_range, look_back, tolerance)["swing_low"]
+
+
+# 1 for higher highs and higher lows, -1 for lower highs and lower lows, 0 otherwise
+@register_indicator("trend", ["high", "low"], warmup=lambda swing_range, look_back, **_: look_back + swing_range - 1,
+                    swing_range=SWING_RANGE, look_back=SWINGS_LOOK_BACK, tolerance=TREND_TOLERANCE)
+def _trend(df, swing_range, look_back, tolerance):
+    return swing_columns(df["high"], df["low"], swing_range, look_back, tolerance)["trend"]
+
+
+def stochastic(high, low, close, period):
+    lowest = rolling_min(low, period)
+    return 100 * ratio(close - lowest, rolling_max(high, period) - lowest)
+
+
+def bollinger_pct(close, window, num_std):
+    mean, var = rolling_mean_var(close, window)
+    band = num_std * np.sqrt(var)
+    return ratio(close - (mean - band), 2 * band)
+
+
+# Stochastic %K and its moving average %D
+@register_indicator("stoch_k", ["high", "low", "close"], warmup=lambda period: period - 1, period=14)
+def _stoch_k(df, period):
+    return stochastic(df["high"].to_numpy(float), df["low"].to_numpy(float), df["close"].to_numpy(float), period)
+
+
+@register_indicator("stoch_d", ["stoch_k"], warmup=lambda window: window - 1, window=3)
+def _stoch_d(df, window):
+    return rolling_mean(df["stoch_k"].to_numpy(float), window)
 
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    df["atr"] = tr.rolling(window=period).mean()
 
+# Position of the close inside the Bollinger bands: 0 on the lower band, 1 on the upper one
+@register_indicator("bb_pct", ["close"], warmup=lambda window, num_std: window - 1, window=20, num_std=2)
+def _bb_pct(df, window, num_std):
+    return bollinger_pct(df["close"].to_numpy(float), window, num_std)
+
+
+@register_indicator("stoch_signal_buy", ["stoch_k", "stoch_d"], level=BUY_STOCH)
+def _stoch_signal_buy(df, level):
+    return (df["stoch_k"] < level) & (df["stoch_k"] > df["stoch_d"])
+
+
+@register_indicator("stoch_signal_sell", ["stoch_k", "stoch_d"], level=SELL_STOCH)
+def _stoch_signal_sell(df, level):
+    return (df["stoch_k"] > level) & (df["stoch_k"] < df["stoch_d"])
+
+
+@register_indicator("bb_signal_buy", ["bb_pct"], level=BUY_BP)
+def _bb_signal_buy(df, level):
+    return df["bb_pct"] < level
+
+
+@register_indicator("bb_signal_sell", ["bb_pct"], level=SELL_BP)
+def _bb_signal_sell(df, level):
+    return df["bb_pct"] > level
+
+
+def add_rsi(df, period=14):
+    df["rsi"] = rsi(df["close"], period)
+    return df
+
+
+def add_short_rsi_indicator(df, period=5):
+    df = df.copy()
+    df["rsi_5"] = rsi(df["close"], period)
+    for name in ["ma_20", "rsi_down_3", "rsi_below_60_3d", "rsi_signal_buy", "rsi_signal_sell"]:
+        df[name] = INDICATORS[name].compute(df)
     return df
 
+
+def add_atr(df, period=14):
+    df = df.copy()
+    df["atr"] = atr(df["high"], df["low"], df["close"], period)
+    return df
@@ -0,0 +1,216 @@
+import os
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+
+STORE_DIR = "kline_store"
+
+COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+DTYPES = {
+    "timestamp": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+}
+
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 60 * 60_000,
+    "2h": 2 * 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "6h": 6 * 60 * 60_000,
+    "8h": 8 * 60 * 60_000,
+    "12h": 12 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+}
+
+# One lock per symbol/interval so batch_fetch threads never interleave writes
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock(symbol, interval):
+    with _locks_guard:
+        return _locks.setdefault((symbol, interval), threading.Lock())
+
+
+def _symbol_dir(symbol, interval, root=None):
+    return os.path.join(root or STORE_DIR, interval, symbol)
+
+
+def _column_path(symbol, interval, column, root=None):
+    return os.path.join(_symbol_dir(symbol, interval, root), f"{column}.bin")
+
+
+def _recover(symbol, interval, root=None):
+    # write_klines swaps whole directories; a crash between its two renames leaves only the
+    # previous directory, which is put back
+    path = _symbol_dir(symbol, interval, root)
+    if not os.path.exists(path) and os.path.isdir(path + ".old"):
+        os.replace(path + ".old", path)
+
+
+def _stored_length(symbol, interval, root=None):
+    # Columns are appended one after the other, so an interrupted write can leave
+    # them with different lengths. Only rows present in every column count.
+    _recover(symbol, interval, root)
+    lengths = []
+    for column in COLUMNS:
+        path = _column_path(symbol, interval, column, root)
+        if not os.path.exists(path):
+            return 0
+        lengths.append(os.path.getsize(path) // np.dtype(DTYPES[column]).itemsize)
+    return min(lengths)
+
+
+def _truncate(symbol, interval, length, root=None):
+    for column in COLUMNS:
+        path = _column_path(symbol, interval, column, root)
+        size = length * np.dtype(DTYPES[column]).itemsize
+        if os.path.getsize(path) != size:
+            with open(path, "r+b") as f:
+                f.truncate(size)
+
+
+def frame_to_arrays(df):
+    if df is None or len(df) == 0:
+        return {column: np.empty(0, dtype=DTYPES[column]) for column in COLUMNS}
+    if "timestamp" in df.columns:
+        timestamps = df["timestamp"].values
+    else:
+        timestamps = df.index.values
+    arrays = {"timestamp": np.asarray(timestamps).astype("datetime64[ms]").astype(np.int64)}
+    for column in COLUMNS[1:]:
+        arrays[column] = np.ascontiguousarray(df[column].values, dtype=np.float64)
+    return arrays
+
+
+def decode_klines(raw):
+    # Binance klines are [open_time, "open", "high", "low", "close", "volume", close_time, ...];
+    # decode them straight into typed columns without going through an object DataFrame
+    count = len(raw)
+    if count == 0:
+        return {column: np.empty(0, dtype=DTYPES[column]) for column in COLUMNS}
+    timestamps = np.fromiter((k[0] for k in raw), dtype=np.int64, count=count)
+    values = np.array([k[1:6] for k in raw], dtype=np.float64).T.copy()
+    arrays = {"timestamp": timestamps}
+    for i, column in enumerate(COLUMNS[1:]):
+        arrays[column] = values[i]
+    return arrays
+
+
+def arrays_to_frame(arrays):
+    df = pd.DataFrame({column: arrays[column] for column in COLUMNS[1:]}, copy=False)
+    df.index = pd.to_datetime(arrays["timestamp"], unit="ms")
+    df.index.name = "timestamp"
+    return df
+
+
+def map_arrays(symbol, interval="1h", root=None):
+    # Read-only memory maps: nothing is read from disk until a slice is touched
+    length = _stored_length(symbol, interval, root)
+    arrays = {}
+    for column in COLUMNS:
+        if length == 0:
+            arrays[column] = np.empty(0, dtype=DTYPES[column])
+            continue
+        arrays[column] = np.memmap(
+            _column_path(symbol, interval, column, root),
+            dtype=DTYPES[column],
+            mode="r",
+            shape=(length,),
+        )
+    return arrays
+
+
+def _to_ms(value):
+    return int(pd.Timestamp(value).to_datetime64().astype("datetime64[ms]").astype(np.int64))
+
+
+def load_arrays(symbol, interval="1h", tail=None, root=None, start=None, end=None):
+    mapped = map_arrays(symbol, interval, root)
+    timestamps = mapped["timestamp"]
+    lo = 0 if start is None else int(np.searchsorted(timestamps, _to_ms(start), side="left"))
+    hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, _to_ms(end), side="right"))
+    if tail is not None:
+        lo = max(lo, hi - tail)
+    # Copy only the requested window out of the maps
+    return {column: np.array(values[lo:hi]) for column, values in mapped.items()}
+
+
+def load_klines(symbol, interval="1h", tail=None, root=None, start=None, end=None):
+    return arrays_to_frame(load_arrays(symbol, interval, tail, root, start, end))
+
+
+def last_timestamp(symbol, interval="1h", root=None):
+    length = _stored_length(symbol, interval, root)
+    if length == 0:
+        return None
+    return int(map_arrays(symbol, interval, root)["timestamp"][-1])
+
+
+def stored_symbols(interval="1h", root=None):
+    base = os.path.join(root or STORE_DIR, interval)
+    if not os.path.isdir(base):
+        return []
+    # Leftovers of an interrupted write_klines (SYMBOL.tmp, SYMBOL.old) map back to their symbol
+    symbols = {name.split(".")[0] for name in os.listdir(base)}
+    return sorted(s for s in symbols if _stored_length(s, interval, root) > 0)
+
+
+# Fast path for the hourly cycle: only candles newer than the last stored one are written
+def append_klines(symbol, interval, df, root=None):
+    with _lock(symbol, interval):
+        arrays = frame_to_arrays(df)
+        length = _stored_length(symbol, interval, root)
+        if length:
+            last = int(map_arrays(symbol, interval, root)["timestamp"][length - 1])
+            mask = arrays["timestamp"] > last
+            arrays = {column: values[mask] for column, values in arrays.items()}
+        count = len(arrays["timestamp"])
+        if count == 0:
+            return 0
+
+        os.makedirs(_symbol_dir(symbol, interval, root), exist_ok=True)
+        if length:
+            _truncate(symbol, interval, length, root)
+        for column in COLUMNS:
+            with open(_column_path(symbol, interval, column, root), "ab") as f:
+                f.write(np.ascontiguousarray(arrays[column], dtype=DTYPES[column]).tobytes())
+        return count
+
+
+# Slow path for backfills: merges candles of any age and rewrites the symbol's files
+def write_klines(symbol, interval, df, root=None):
+    with _lock(symbol, interval):
+        new = frame_to_arrays(df)
+        old = load_arrays(symbol, interval, root=root)
+        timestamps = np.concatenate([old["timestamp"], new["timestamp"]])
+        # Newer data wins on duplicate timestamps
+        order = np.argsort(timestamps[::-1], kind="stable")
+        unique_ts, first = np.unique(timestamps[::-1][order], return_index=True)
+        picks = (len(timestamps) - 1) - order[first]
+
+        # Every column goes into a new directory that replaces the old one as a whole, so a crash
+        # never leaves some columns rewritten and others not
+        path = _symbol_dir(symbol, interval, root)
+        tmp, previous = path + ".tmp", path + ".old"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for column in COLUMNS:
+            merged = np.concatenate([old[column], new[column]])[picks]
+            with open(os.path.join(tmp, f"{column}.bin"), "wb") as f:
+                f.write(np.ascontiguousarray(merged, dtype=DTYPES[column]).tobytes())
+        shutil.rmtree(previous, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, previous)
+        os.replace(tmp, path)
+        shutil.rmtree(previous, ignore_errors=True)
+        return len(unique_ts)
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import threading
+import time
+import pandas as pd
+from fetcher import fetch_incremental
+from kline_store import INTERVAL_MS, append_klines
+from resample import Resampler
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+BINANCE_STREAM_URL = "wss://stream.binance.com:9443/stream"
+
+
+async def websocket_transport(url):
+    if websockets is None:
+        raise RuntimeError("Streaming mode needs the websockets package: pip install websockets")
+    async with websockets.connect(url, ping_interval=20) as ws:
+        async for message in ws:
+            yield message
+
+
+def replay_transport(messages, delay=0):
+    # Stand-in for the exchange: replays recorded stream messages in order
+    async def transport(url):
+        for message in messages:
+            if delay:
+                await asyncio.sleep(delay)
+            yield message if isinstance(message, str) else json.dumps(message)
+    transport.finite = True
+    return transport
+
+
+def _bars_frame(bars):
+    return pd.DataFrame([bar for _, bar in bars], columns=["open", "high", "low", "close", "volume"],
+                        index=pd.DatetimeIndex([timestamp for timestamp, _ in bars], name="timestamp"))
+
+
+class KlineStream:
+    # backfill(symbol, interval, limit) returns a symbol's recent candles and stores the closed ones;
+    # it runs at warm-up and after missed bars. root is the kline store streamed bars are appended to.
+    # Bars of higher_intervals are built locally from the streamed ones, without extra subscriptions.
+    def __init__(self, symbols, interval="1h", on_bar_close=None, transport=websocket_transport,
+                 history=1000, store=True, reconnect_delay=5, backfill=fetch_incremental, root=None,
+                 higher_intervals=(), on_higher_bar_close=None):
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.on_bar_close = on_bar_close
+        self.transport = transport
+        self.history = history
+        self.store = store
+        self.reconnect_delay = reconnect_delay
+        self.backfill = backfill
+        self.root = root
+        self.higher_intervals = list(higher_intervals)
+        self.on_higher_bar_close = on_higher_bar_close
+        self.frames = {}
+        self.higher = {}
+        self.resamplers = {}
+        self.latest = {}
+        self.writes = None
+        self.running = False
+
+    def url(self):
+        streams = "/".join(f"{symbol.lower()}usdt@kline_{self.interval}" for symbol in self.symbols)
+        return f"{BINANCE_STREAM_URL}?streams={streams}"
+
+    def _load_closed(self, symbol):
+        df = self.backfill(symbol, self.interval, self.history)
+        open_ms = df.index.values.astype("datetime64[ms]").astype("int64")
+        self.frames[symbol] = df[open_ms + INTERVAL_MS[self.interval] <= int(time.time() * 1000)]
+        # Higher-timeframe bars are rebuilt from the reloaded candles; each resampler keeps the bar still forming
+        for interval in self.higher_intervals:
+            resampler = Resampler(interval, self.interval)
+            self.higher[(symbol, interval)] = _bars_frame(resampler.update_frame(self.frames[symbol]))
+            self.resamplers[(symbol, interval)] = resampler
+
+    async def warm_up(self):
+        await asyncio.gather(*(asyncio.to_thread(self._load_closed, symbol) for symbol in self.symbols))
+
+    def frame(self, symbol):
+        return self.frames.get(symbol)
+
+    def higher_frame(self, symbol, interval):
+        return self.higher.get((symbol, interval))
+
+    def forming_bar(self, symbol, interval):
+        # (open time, OHLCV so far) of the higher-timeframe bar the next base candles go into
+        resampler = self.resamplers.get((symbol, interval))
+        return resampler.partial if resampler else None
+
+    def _last_higher(self, symbol):
+        last = {}
+        for interval in self.higher_intervals:
+            frame = self.higher.get((symbol, interval))
+            last[interval] = frame.index[-1] if frame is not None and len(frame) else None
+        return last
+
+    async def handle_message(self, message):
+        data = json.loads(message)
+        data = data.get("data", data)
+        if data.get("e") != "kline":
+            return
+        k = data["k"]
+        symbol = data["s"][:-len("USDT")]
+        open_time = pd.to_datetime(k["t"], unit="ms")
+        candle = {
+            "open": float(k["o"]),
+            "high": float(k["h"]),
+            "low": float(k["l"]),
+            "close": float(k["c"]),
+            "volume": float(k["v"]),
+        }
+        self.latest[symbol] = (open_time, candle)
+        if not k["x"]:
+            return
+
+        df = self.frames.get(symbol)
+        if df is not None and len(df) and open_time <= df.index[-1]:
+            return
+        step = pd.Timedelta(milliseconds=INTERVAL_MS[self.interval])
+        completed = []
+        if df is None or not len(df) or open_time - df.index[-1] > step:
+            # Missed bars (reconnect or late subscription): reload them from REST
+            before = self._last_higher(symbol)
+            await asyncio.to_thread(self._load_closed, symbol)
+            df = self.frames[symbol]
+            completed = [interval for interval, last in self._last_higher(symbol).items() if last != before[interval]]
+        if not len(df) or open_time > df.index[-1]:
+            row = pd.DataFrame([candle], index=pd.DatetimeIndex([open_time], name="timestamp"))
+            df = pd.concat([df, row]).iloc[-self.history:]
+            self.frames[symbol] = df
+            if self.store and self.writes is not None:
+                self.writes.put_nowait((symbol, row))
+            elif self.store:
+                await asyncio.to_thread(append_klines, symbol, self.interval, row, self.root)
+            for interval in self.higher_intervals:
+                bars = self.resamplers[(symbol, interval)].update(open_time, candle)
+                if bars:
+                    higher = pd.concat([self.higher[(symbol, interval)], _bars_frame(bars)])
+                    self.higher[(symbol, interval)] = higher.iloc[-self.history:]
+                    completed.append(interval)
+
+        if self.on_bar_close:
+            result = self.on_bar_close(symbol, df)
+            if asyncio.iscoroutine(result):
+                await result
+        if self.on_higher_bar_close:
+            for interval in completed:
+                result = self.on_higher_bar_close(symbol, interval, self.higher[(symbol, interval)])
+                if asyncio.iscoroutine(result):
+                    await result
+
+    async def _write_bars(self):
+        # Closed bars go to the store from a worker thread, one at a time and in arrival order, so
+        # the event loop keeps reading the websocket while many symbols close at once
+        while True:
+            symbol, row = await self.writes.get()
+            try:
+                await asyncio.to_thread(append_klines, symbol, self.interval, row, self.root)
+            except Exception as e:
+                print(f"⚠️ Could not store the {symbol} bar: {e}")
+            finally:
+                self.writes.task_done()
+
+    async def run(self):
+        self.running = True
+        self.writes = asyncio.Queue()
+        writer = asyncio.create_task(self._write_bars())
+        try:
+            await self.warm_up()
+            while self.running:
+                try:
+                    async for message in self.transport(self.url()):
+                        await self.handle_message(message)
+                        if not self.running:
+                            break
+                    if getattr(self.transport, "finite", False):
+                        break
+                except Exception as e:
+                    print(f"⚠️ Kline stream error: {e}, reconnecting in {self.reconnect_delay}s")
+                    await asyncio.sleep(self.reconnect_delay)
+        finally:
+            self.running = False
+            # Bars already received are still stored
+            await self.writes.join()
+            writer.cancel()
+            self.writes = None
+
+    def stop(self):
+        self.running = False
+
+    def start_in_thread(self):
+        thread = threading.Thread(target=asyncio.run, args=(self.run(),), daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,110 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import BINANCE_URL
+
+# Binance allows 6000 request weight per minute per IP; we keep a share of it free
+WEIGHT_LIMIT_PER_MINUTE = 6000
+WEIGHT_SHARE = 0.8
+KLINES_WEIGHT = 2
+RETRY_STATUSES = {418, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def acquire(self, tokens=1):
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.refill_per_second
+            time.sleep(wait)
+
+    def limit_to(self, tokens):
+        # The exchange's own count wins when other clients share our IP
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, tokens)
+
+
+class MarketDataClient:
+    def __init__(self, base_url=BINANCE_URL, pool_size=16, timeout=(3.05, 10), max_retries=4,
+                 backoff=0.5, weight_limit=WEIGHT_LIMIT_PER_MINUTE, max_workers=8):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_workers = max_workers
+        self.budget = weight_limit * WEIGHT_SHARE
+        # Bursts are capped at a tenth of the minute's budget
+        self.bucket = TokenBucket(self.budget / 10, self.budget / 60)
+        self.used_weight = 0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _track_weight(self, response):
+        used = response.headers.get("X-MBX-USED-WEIGHT-1M")
+        if used is None:
+            return
+        self.used_weight = int(used)
+        self.bucket.limit_to(self.budget - self.used_weight)
+
+    def _retry_delay(self, attempt, response=None):
+        if response is not None and response.headers.get("Retry-After"):
+            return float(response.headers["Retry-After"])
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def get(self, params, weight=KLINES_WEIGHT, url=None):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire(weight)
+            try:
+                response = self.session.get(url or self.base_url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"⚠️ {params.get('symbol')}: {e}, retrying")
+                time.sleep(self._retry_delay(attempt))
+                continue
+
+            self._track_weight(response)
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                raise ValueError(f"Failed to fetch {params.get('symbol')}: {response.text}")
+            time.sleep(self._retry_delay(attempt, response))
+
+    def concurrency(self):
+        # Full parallelism below half of the budget, shrinking towards one worker as it fills up
+        headroom = max(0.0, 1 - self.used_weight / self.budget)
+        return max(1, min(self.max_workers, round(self.max_workers * headroom * 2)))
+
+    def fetch_many(self, func, symbols):
+        results = {}
+        errors = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency()) as executor:
+            futures = {executor.submit(func, symbol): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    results[symbol] = future.result()
+                except Exception as e:
+                    errors[symbol] = e
+        return results, errors
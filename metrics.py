@@ -0,0 +1,155 @@
+import math
+import numpy as np
+import pandas as pd
+
+HOURS_PER_YEAR = 24 * 365
+
+
+# Vectorized metrics over whole equity curves and trade lists. Equity curves start at any
+# positive value; returns are per step, and periods_per_year annualizes them (8760 for 1h).
+def equity_returns(equity):
+    equity = np.asarray(equity, dtype=float)
+    return np.diff(equity) / equity[:-1]
+
+
+def drawdowns(equity):
+    equity = np.asarray(equity, dtype=float)
+    peak = np.maximum.accumulate(equity)
+    return (peak - equity) / peak
+
+
+def max_drawdown(equity):
+    return float(drawdowns(equity).max()) if len(equity) else 0.0
+
+
+def sharpe_ratio(returns, periods_per_year=HOURS_PER_YEAR):
+    std = np.std(returns)
+    return float(np.mean(returns) / std * math.sqrt(periods_per_year)) if std else 0.0
+
+
+def sortino_ratio(returns, periods_per_year=HOURS_PER_YEAR):
+    # Downside deviation counts every period, with non-negative returns as zero
+    downside = math.sqrt(np.mean(np.minimum(returns, 0.0) ** 2)) if len(returns) else 0.0
+    return float(np.mean(returns) / downside * math.sqrt(periods_per_year)) if downside else 0.0
+
+
+def cagr(equity, periods_per_year=HOURS_PER_YEAR):
+    years = len(equity) / periods_per_year
+    return float((equity[-1] / equity[0]) ** (1 / years) - 1)
+
+
+def profit_factor(trades):
+    trades = np.asarray(trades, dtype=float)
+    lost = abs(trades[trades <= 0].sum())
+    return float(trades[trades > 0].sum() / lost) if lost else float("inf")
+
+
+def exposure(trade_log, n_steps, open_entry_step=None):
+    # Share of steps spent in a position, from the entry/exit steps of each trade
+    entries = np.array([t["entry_step"] for t in trade_log], dtype=float)
+    exits = np.array([t["exit_step"] for t in trade_log], dtype=float)
+    held = (exits - entries).sum()
+    if open_entry_step is not None:
+        held += n_steps - 1 - open_entry_step
+    return float(held / n_steps) if n_steps else 0.0
+
+
+def symbol_attribution(trade_log):
+    # Per-symbol trade count, win rate and share of the compounded return
+    if not trade_log:
+        return pd.DataFrame(columns=["trades", "winrate", "avg_gain", "compounded_gain", "log_return_share"])
+    trades = pd.DataFrame(trade_log)
+    trades["log_return"] = np.log1p(trades["gain"])
+    grouped = trades.groupby("symbol")
+    result = pd.DataFrame({
+        "trades": grouped.size(),
+        "winrate": grouped["gain"].apply(lambda g: (g > 0).mean() * 100),
+        "avg_gain": grouped["gain"].mean() * 100,
+        "compounded_gain": np.expm1(grouped["log_return"].sum()) * 100,
+    })
+    total = trades["log_return"].sum()
+    result["log_return_share"] = grouped["log_return"].sum() / total if total else 0.0
+    return result.sort_values("compounded_gain", ascending=False)
+
+
+def trade_stats(trades):
+    trades = np.asarray(trades, dtype=float)
+    total = len(trades)
+    wins = trades[trades > 0]
+    losses = trades[trades <= 0]
+    winrate = len(wins) / total * 100 if total else 0
+    avg_win = wins.mean() * 100 if len(wins) else 0
+    avg_loss = losses.mean() * 100 if len(losses) else 0
+    return {
+        "total": total,
+        "winrate": winrate,
+        "avg_trade": trades.mean() * 100 if total else 0,
+        "avg_win": avg_win,
+        "avg_loss": avg_loss,
+        "expectancy": winrate / 100 * avg_win + (1 - winrate / 100) * avg_loss,
+        "profit_factor": profit_factor(trades),
+    }
+
+
+class StreamingMetrics:
+    # The same metrics kept up to date one equity value (and one closed trade) at a time, in O(1)
+    def __init__(self, periods_per_year=HOURS_PER_YEAR):
+        self.periods_per_year = periods_per_year
+        self.first = None
+        self.last = None
+        self.peak = None
+        self.max_drawdown = 0.0
+        self.steps = 0
+        self.steps_in_position = 0
+        # Welford running mean and variance of returns, plus the downside sum of squares
+        self.n_returns = 0
+        self.mean_return = 0.0
+        self.m2 = 0.0
+        self.downside_squares = 0.0
+        self.n_trades = 0
+        self.wins = 0
+        self.sum_wins = 0.0
+        self.sum_losses = 0.0
+        self.n_losses = 0
+
+    def update(self, equity, in_position=False):
+        if self.last is not None:
+            r = equity / self.last - 1
+            self.n_returns += 1
+            delta = r - self.mean_return
+            self.mean_return += delta / self.n_returns
+            self.m2 += delta * (r - self.mean_return)
+            self.downside_squares += min(r, 0.0) ** 2
+        if self.first is None:
+            self.first = equity
+        self.last = equity
+        self.peak = equity if self.peak is None else max(self.peak, equity)
+        self.max_drawdown = max(self.max_drawdown, (self.peak - equity) / self.peak)
+        self.steps += 1
+        self.steps_in_position += bool(in_position)
+
+    def add_trade(self, gain):
+        self.n_trades += 1
+        if gain > 0:
+            self.wins += 1
+            self.sum_wins += gain
+        else:
+            self.n_losses += 1
+            self.sum_losses += gain
+
+    def snapshot(self):
+        annualize = math.sqrt(self.periods_per_year)
+        std = math.sqrt(self.m2 / self.n_returns) if self.n_returns else 0.0
+        downside = math.sqrt(self.downside_squares / self.n_returns) if self.n_returns else 0.0
+        years = self.steps / self.periods_per_year
+        return {
+            "total_gain": (self.last / self.first - 1) * 100 if self.first else 0.0,
+            "max_drawdown": self.max_drawdown * 100,
+            "sharpe_ratio": self.mean_return / std * annualize if std else 0.0,
+            "sortino_ratio": self.mean_return / downside * annualize if downside else 0.0,
+            "cagr": (self.last / self.first) ** (1 / years) - 1 if self.first and years else 0.0,
+            "exposure": self.steps_in_position / self.steps if self.steps else 0.0,
+            "total": self.n_trades,
+            "winrate": self.wins / self.n_trades * 100 if self.n_trades else 0,
+            "profit_factor": self.sum_wins / abs(self.sum_losses) if self.n_losses and self.sum_losses else float("inf"),
+        }
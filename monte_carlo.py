@@ -0,0 +1,110 @@
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+PATHS = 20_000
+METHODS = ("bootstrap", "shuffle")
+# Equity at or below this share of the starting capital counts as ruin
+RUIN_LEVEL = 0.5
+PERCENTILES = (5, 50, 95)
+# Default seed of the command lines, so the same trades give the same report
+SEED = 0
+# Paths x trades per batch, about 16 MB for each of the two float arrays a batch needs
+BATCH_ELEMENTS = 2_000_000
+
+
+def simulate(trades, n_paths, method="bootstrap", seed=None, ruin_level=RUIN_LEVEL):
+    # One batch of synthetic equity paths from the trade gains: bootstrap draws trades with
+    # replacement, shuffle only reorders them (same final equity, different drawdowns)
+    rng = np.random.default_rng(seed)
+    trades = np.asarray(trades, dtype=float)
+    if method == "bootstrap":
+        sample = trades[rng.integers(0, len(trades), (n_paths, len(trades)))]
+    elif method == "shuffle":
+        sample = rng.permuted(np.tile(trades, (n_paths, 1)), axis=1)
+    else:
+        raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}")
+    # In place from here on: a batch needs two paths x trades arrays, not one per step
+    equity = np.cumprod(np.add(sample, 1, out=sample), axis=1, out=sample)
+    # The peak includes the starting capital of 1
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    ruined = equity.min(axis=1) <= ruin_level
+    final = equity[:, -1].copy()
+    drawdown = np.subtract(1, np.divide(equity, peak, out=peak), out=peak).max(axis=1)
+    return final, drawdown, ruined
+
+
+def _simulate_batch(task):
+    return simulate(*task)
+
+
+def monte_carlo(trades, n_paths=PATHS, method="bootstrap", seed=None, ruin_level=RUIN_LEVEL, workers=1):
+    # Every batch gets its own child seed, so results depend on the seed and not on the worker count
+    trades = np.asarray(trades, dtype=float)
+    per_batch = max(1, BATCH_ELEMENTS // len(trades))
+    sizes = [min(per_batch, n_paths - start) for start in range(0, n_paths, per_batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(trades, size, method, child, ruin_level) for size, child in zip(sizes, seeds)]
+    if workers and workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            batches = list(pool.map(_simulate_batch, tasks))
+    else:
+        batches = [_simulate_batch(task) for task in tasks]
+    final, drawdown, ruined = (np.concatenate(parts) for parts in zip(*batches))
+    return {"final_equity": final, "max_drawdown": drawdown, "ruined": ruined}
+
+
+def summarize_paths(paths, years=None, percentiles=PERCENTILES):
+    final, drawdown, ruined = paths["final_equity"], paths["max_drawdown"], paths["ruined"]
+    n_paths = len(final)
+    summary = {"paths": n_paths}
+    for p, gain, dd in zip(percentiles, np.percentile((final - 1) * 100, percentiles),
+                           np.percentile(drawdown * 100, percentiles)):
+        summary[f"total_gain_p{p}"] = round(float(gain), 2)
+        summary[f"max_drawdown_p{p}"] = round(float(dd), 2)
+    if years:
+        for p, cagr in zip(percentiles, np.percentile(final ** (1 / years) - 1, percentiles)):
+            summary[f"cagr_p{p}"] = round(float(cagr * 100), 2)
+    summary["probability_of_loss"] = round(float((final < 1).mean() * 100), 2)
+    # Risk of ruin with a 95% normal-approximation interval for the sampling error
+    risk = ruined.mean()
+    margin = 1.96 * math.sqrt(risk * (1 - risk) / n_paths)
+    summary["risk_of_ruin"] = round(float(risk * 100), 2)
+    summary["risk_of_ruin_low"] = round(float(max(risk - margin, 0) * 100), 2)
+    summary["risk_of_ruin_high"] = round(float(min(risk + margin, 1) * 100), 2)
+    return summary
+
+
+def run(trades, n_paths=PATHS, method="bootstrap", seed=None, ruin_level=RUIN_LEVEL, years=None, workers=1):
+    if not len(trades):
+        print("⚠️ No trades to resample")
+        return None
+    return summarize_paths(monte_carlo(trades, n_paths, method, seed, ruin_level, workers), years)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo resampling of a backtest's trades")
+    parser.add_argument("trades", help="trades.csv written by backtest_cli.py")
+    parser.add_argument("--paths", type=int, default=PATHS)
+    parser.add_argument("--method", choices=METHODS, default="bootstrap")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--ruin-level", type=float, default=RUIN_LEVEL)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    trades = pd.read_csv(args.trades, parse_dates=["entry_time", "exit_time"])
+    years = None
+    if len(trades):
+        years = (trades["exit_time"].iloc[-1] - trades["entry_time"].iloc[0]) / pd.Timedelta(days=365)
+    summary = run(trades["gain"].to_numpy(), args.paths, args.method, args.seed, args.ruin_level, years, args.workers)
+    if summary is None:
+        return
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from config import LAYER1_COINS, BACKTEST_RANGE
+from fetcher import load_backtest_data
+from indicator_cache import cached_indicator_frames
+from strategy import signal_array, REQUIRED_COLUMNS
+from backtest_engine import aligned_steps, align_arrays, run_backtest_arrays, summarize, TP_MULT, SL_MULT
+
+# Values tried for each parameter. Dotted names override a registered indicator parameter.
+SEARCH_SPACE = {
+    "tp_mult": [1.5, 2, 2.5, 3, 4],
+    "sl_mult": [2, 3, 4],
+    "cooldown_time": [0, 6, 24],
+    "rsi_5.period": [3, 5, 7],
+}
+RESULTS_PATH = "optimizer_results.csv"
+
+# Per-process state, filled once by the pool initializer
+_worker = {}
+
+
+def _init_worker(symbols, backtest_range):
+    # Each worker reads the memory-mapped store once; tasks then only carry parameters
+    coin_data = load_backtest_data(symbols)
+    _worker["coin_data"] = coin_data
+    _worker["symbols"] = [s for s in symbols if s in coin_data]
+    _worker["aligned_index"] = aligned_steps(coin_data, symbols, backtest_range)
+    _worker["arrays"] = {}
+
+
+def indicator_params(params):
+    overrides = {}
+    for key, value in params.items():
+        if "." in key:
+            name, param = key.split(".", 1)
+            overrides.setdefault(name, {})[param] = value
+    return overrides
+
+
+def _arrays_for(overrides):
+    # Tasks arrive ordered by indicator parameters, so only the latest arrays are kept
+    key = json.dumps(overrides, sort_keys=True)
+    if key not in _worker["arrays"]:
+        symbols = _worker["symbols"]
+        frames = cached_indicator_frames(_worker["coin_data"], symbols, REQUIRED_COLUMNS + ["atr"], params=overrides)
+        signals = {symbol: signal_array(df) for symbol, df in frames.items()}
+        _worker["arrays"] = {key: align_arrays(frames, symbols, _worker["aligned_index"], signals)}
+    return _worker["arrays"][key]
+
+
+def evaluate(params):
+    arrays = _arrays_for(indicator_params(params))
+    state = run_backtest_arrays(arrays, tp_mult=params.get("tp_mult", TP_MULT), sl_mult=params.get("sl_mult", SL_MULT),
+                                cooldown_time=params.get("cooldown_time", 0))
+    return {**params, **summarize(state.equity, state.trades, state.capital)}
+
+
+def grid(space):
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*space.values())]
+
+
+def random_search(space, n, seed=None):
+    rng = random.Random(seed)
+    candidates = {}
+    for _ in range(n):
+        params = {key: rng.choice(values) for key, values in space.items()}
+        candidates[json.dumps(params, sort_keys=True)] = params
+    return list(candidates.values())
+
+
+def run_sweep(candidates, symbols=None, backtest_range=BACKTEST_RANGE, workers=None, metric="total_gain"):
+    symbols = list(LAYER1_COINS.values()) if symbols is None else symbols
+    workers = workers or os.cpu_count()
+    candidates = sorted(candidates, key=lambda p: json.dumps(indicator_params(p), sort_keys=True))
+    chunksize = max(1, len(candidates) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(symbols, backtest_range)) as pool:
+        rows = list(pool.map(evaluate, candidates, chunksize=chunksize))
+    return pd.DataFrame(rows).sort_values(metric, ascending=False).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep strategy and risk parameters over the stored backtest data")
+    parser.add_argument("--random", type=int, help="sample this many parameter sets instead of the full grid")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--metric", default="total_gain")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    candidates = random_search(SEARCH_SPACE, args.random, args.seed) if args.random else grid(SEARCH_SPACE)
+    print(f"🔎 Running {len(candidates)} backtests")
+    results = run_sweep(candidates, workers=args.workers, metric=args.metric)
+    results.to_csv(args.output, index=False)
+    print(results.head(args.top).to_string())
+    print(f"✅ Saved {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
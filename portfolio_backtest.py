@@ -0,0 +1,170 @@
+import argparse
+import numpy as np
+from config import LAYER1_COINS, BACKTEST_RANGE, RISK_MANAGEMENT, MAX_POSITIONS
+from fetcher import load_backtest_data
+from kline_store import stored_symbols
+from strategy import BUY, SELL
+from backtest_engine import history_arrays, slice_arrays, summarize, TP_MULT, SL_MULT
+
+RANKINGS = ("random", "symbol", "volatility")
+# Fixed by default, so repeated runs on the same data take the same trades
+SEED = 0
+
+
+def entry_candidates(arrays, rank="random", seed=SEED):
+    # Every (step, symbol) with an enterable BUY, ordered by step and then by the order they take
+    # free slots in. Step i's candidates are columns[bounds[i]:bounds[i + 1]].
+    steps, columns = np.nonzero((arrays["signal"] == BUY) & arrays["present"])
+    if rank == "random":
+        # Ties between same-step signals are broken at random instead of by settings.json order
+        order = np.lexsort((np.random.default_rng(seed).random(len(steps)), steps))
+    elif rank == "volatility":
+        # Largest ATR relative to price first
+        score = arrays["atr"][steps, columns] / arrays["close"][steps, columns]
+        order = np.lexsort((-score, steps))
+    elif rank == "symbol":
+        order = np.arange(len(steps))
+    else:
+        raise ValueError(f"Unknown ranking {rank!r}, expected one of {RANKINGS}")
+    steps, columns = steps[order], columns[order]
+    return columns, np.searchsorted(steps, np.arange(len(arrays["signal"]) + 1))
+
+
+class PortfolioState:
+    # Cash, the open position slots and the marked-to-market equity curve, resumable like BacktestState
+    def __init__(self, n_steps, n_symbols, max_positions):
+        self.step = 1
+        self.cash = 1.0
+        self.equity = np.zeros(n_steps)
+        self.equity[0] = self.cash
+        self.open_positions = np.zeros(n_steps, dtype=np.int32)
+        self.trades = []
+        self.trade_log = []
+        # One entry per slot; a column of -1 is a free slot
+        self.column = np.full(max_positions, -1)
+        self.units = np.zeros(max_positions)
+        self.entry_price = np.zeros(max_positions)
+        self.entry_step = np.zeros(max_positions, dtype=int)
+        self.take_profit = np.zeros(max_positions)
+        self.stop_loss = np.zeros(max_positions)
+        self.last_price = np.zeros(max_positions)
+        self.held = np.zeros(n_symbols, dtype=bool)
+        self.cooldown_until = np.zeros(n_symbols, dtype=int)
+        # How same-step signals were ranked, reported with the stats
+        self.rank = None
+        self.seed = None
+
+    @property
+    def capital(self):
+        return self.equity[self.step - 1]
+
+
+def run_portfolio_arrays(arrays, state=None, end=None, max_positions=MAX_POSITIONS, risk=RISK_MANAGEMENT,
+                         tp_mult=TP_MULT, sl_mult=SL_MULT, cooldown_time=0, rank="random", seed=SEED, on_trade=None):
+    # Up to max_positions open at once, each entered with `risk` of the free cash like trader.enter_trade.
+    # Exits use the same rules as run_backtest_arrays; per-step work is over the open slots, never the panel,
+    # so the cost grows with the number of positions and signals rather than the number of symbols.
+    close, atr, signal, present = arrays["close"], arrays["atr"], arrays["signal"], arrays["present"]
+    n_steps, n_symbols = close.shape
+    end = n_steps if end is None else end
+    state = PortfolioState(n_steps, n_symbols, max_positions) if state is None else state
+    state.rank, state.seed = rank, seed if rank == "random" else None
+    candidates, bounds = entry_candidates(arrays, rank, seed)
+
+    for i in range(state.step, end):
+        # Slots freed by this step's exits are only refilled from the next step, as in the single-position loop
+        free_slots = list(np.flatnonzero(state.column < 0))
+        slots = np.flatnonzero(state.column >= 0)
+        if len(slots):
+            columns = state.column[slots]
+            live = present[i, columns]
+            price = close[i, columns]
+            gain = (price - state.entry_price[slots]) / state.entry_price[slots]
+            state.last_price[slots[live]] = price[live]
+            stopped = -state.stop_loss[slots] > gain
+            exits = live & ((signal[i, columns] == SELL) | stopped | (state.take_profit[slots] < gain))
+            for slot, column, exit_price, exit_gain, was_stopped in zip(slots[exits], columns[exits], price[exits],
+                                                                        gain[exits], stopped[exits]):
+                if on_trade is not None:
+                    on_trade("exit", i, column, state.entry_price[slot], exit_price, exit_gain, signal[i, column])
+                if was_stopped:
+                    state.cooldown_until[column] = i + cooldown_time
+                state.cash += state.units[slot] * exit_price
+                state.trades.append(exit_gain)
+                state.trade_log.append({
+                    "symbol": arrays["symbols"][column], "entry_step": state.entry_step[slot], "exit_step": i,
+                    "entry_price": state.entry_price[slot], "exit_price": exit_price, "gain": exit_gain,
+                })
+                state.held[column] = False
+                state.column[slot] = -1
+                state.units[slot] = 0
+
+        for column in candidates[bounds[i]:bounds[i + 1]]:
+            if not free_slots:
+                break
+            if state.held[column] or i < state.cooldown_until[column]:
+                continue
+            slot = free_slots.pop(0)
+            price = close[i, column]
+            value = risk * state.cash
+            state.cash -= value
+            state.units[slot] = value / price
+            state.column[slot] = column
+            state.entry_price[slot] = state.last_price[slot] = price
+            state.entry_step[slot] = i
+            state.take_profit[slot] = atr[i, column] * tp_mult
+            state.stop_loss[slot] = atr[i, column] * sl_mult
+            state.held[column] = True
+            if on_trade is not None:
+                on_trade("entry", i, column, price, None, None, BUY)
+
+        # Open positions are marked at their last known close
+        held = state.column >= 0
+        state.equity[i] = state.cash + state.units[held] @ state.last_price[held]
+        state.open_positions[i] = held.sum()
+    state.step = max(state.step, end)
+    return state
+
+
+def summarize_portfolio(state):
+    stats = summarize(state.equity[:state.step], state.trades, state.capital)
+    positions = state.open_positions[:state.step]
+    stats["avg_open_positions"] = round(float(positions.mean()), 2)
+    stats["exposure"] = round(float((positions > 0).mean() * 100), 2)
+    stats["rank"] = state.rank
+    if state.seed is not None:
+        stats["seed"] = state.seed
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest with several concurrent positions over the stored history")
+    parser.add_argument("--symbols", nargs="+", help="defaults to the coins in settings.json")
+    parser.add_argument("--all-stored", action="store_true", help="use every symbol in the kline store")
+    parser.add_argument("--range", type=int, default=BACKTEST_RANGE, help="most recent hours to backtest, 0 for all")
+    parser.add_argument("--max-positions", type=int, default=MAX_POSITIONS)
+    parser.add_argument("--risk", type=float, default=RISK_MANAGEMENT, help="share of free cash put into each entry")
+    parser.add_argument("--rank", choices=RANKINGS, default="random", help="which same-step signals get free slots")
+    parser.add_argument("--seed", type=int, default=SEED, help="tie-break seed for --rank random")
+    parser.add_argument("--tp-mult", type=float, default=TP_MULT)
+    parser.add_argument("--sl-mult", type=float, default=SL_MULT)
+    parser.add_argument("--cooldown", type=int, default=0)
+    args = parser.parse_args()
+
+    symbols = stored_symbols() if args.all_stored else args.symbols or list(LAYER1_COINS.values())
+    coin_data = load_backtest_data(symbols)
+    if not coin_data:
+        return
+    # Symbols join the panel when their history starts instead of the backtest waiting for all of them
+    arrays = history_arrays(coin_data, symbols)
+    if args.range:
+        arrays = slice_arrays(arrays, max(0, len(arrays["close"]) - args.range), len(arrays["close"]))
+    state = run_portfolio_arrays(arrays, max_positions=args.max_positions, risk=args.risk, tp_mult=args.tp_mult,
+                                 sl_mult=args.sl_mult, cooldown_time=args.cooldown, rank=args.rank, seed=args.seed)
+    for key, value in summarize_portfolio(state).items():
+        print(f"{key}: {value}")
+    print(f"✅ {len(arrays['symbols'])} symbols x {len(arrays['close'])} steps, {len(state.trades)} trades")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+from kline_store import INTERVAL_MS, frame_to_arrays, arrays_to_frame
+
+
+def resample_arrays(arrays, interval, base_interval="1h", drop_partial=True):
+    step = INTERVAL_MS[interval]
+    base_step = INTERVAL_MS[base_interval]
+    if step % base_step:
+        raise ValueError(f"{interval} is not a multiple of {base_interval}")
+
+    timestamps = arrays["timestamp"]
+    if len(timestamps) == 0:
+        return {column: np.empty(0, dtype=values.dtype) for column, values in arrays.items()}
+
+    # Binance aligns every interval to the epoch in UTC, so buckets are plain integer divisions
+    buckets = timestamps // step * step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(timestamps)] - 1
+    result = {
+        "timestamp": buckets[starts],
+        "open": arrays["open"][starts],
+        "high": np.maximum.reduceat(arrays["high"], starts),
+        "low": np.minimum.reduceat(arrays["low"], starts),
+        "close": arrays["close"][ends],
+        "volume": np.add.reduceat(arrays["volume"], starts),
+    }
+
+    if drop_partial:
+        # The history can start mid-bucket, and the last bucket can still be forming
+        keep = slice(
+            1 if timestamps[0] > result["timestamp"][0] else 0,
+            -1 if timestamps[-1] + base_step < result["timestamp"][-1] + step else None,
+        )
+        result = {column: values[keep] for column, values in result.items()}
+    return result
+
+
+def resample_ohlcv(df, interval, base_interval="1h", drop_partial=True):
+    return arrays_to_frame(resample_arrays(frame_to_arrays(df), interval, base_interval, drop_partial))
+
+
+class Resampler:
+    def __init__(self, interval, base_interval="1h"):
+        self.step = INTERVAL_MS[interval]
+        self.base_step = INTERVAL_MS[base_interval]
+        if self.step % self.base_step:
+            raise ValueError(f"{interval} is not a multiple of {base_interval}")
+        self.bar = None
+        self.last_timestamp = None
+        # A bar whose bucket started before the first base candle we saw is never emitted
+        self.bar_is_clipped = False
+
+    @property
+    def partial(self):
+        # The higher-timeframe bar built so far from the base candles of its bucket
+        if self.bar is None:
+            return None
+        return pd.Timestamp(self.bar["timestamp"], unit="ms"), {k: v for k, v in self.bar.items() if k != "timestamp"}
+
+    def update(self, timestamp, candle):
+        # Feed one closed base candle; returns the bars it completed, oldest first
+        if isinstance(timestamp, pd.Timestamp):
+            timestamp = int(timestamp.to_datetime64().astype("datetime64[ms]").astype(np.int64))
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return []
+        first = self.last_timestamp is None
+        self.last_timestamp = timestamp
+
+        completed = []
+        bucket = timestamp // self.step * self.step
+        if self.bar is not None and self.bar["timestamp"] != bucket:
+            # The previous bucket ended with missing base candles
+            completed.append(self._emit())
+        if self.bar is None:
+            self.bar_is_clipped = first and timestamp != bucket
+            self.bar = {
+                "timestamp": bucket,
+                "open": candle["open"],
+                "high": candle["high"],
+                "low": candle["low"],
+                "close": candle["close"],
+                "volume": candle["volume"],
+            }
+        else:
+            self.bar["high"] = max(self.bar["high"], candle["high"])
+            self.bar["low"] = min(self.bar["low"], candle["low"])
+            self.bar["close"] = candle["close"]
+            self.bar["volume"] += candle["volume"]
+
+        if timestamp + self.base_step == bucket + self.step:
+            completed.append(self._emit())
+        return [bar for bar in completed if bar is not None]
+
+    def update_frame(self, df):
+        completed = []
+        for timestamp, row in zip(df.index, df[["open", "high", "low", "close", "volume"]].to_dict("records")):
+            completed.extend(self.update(timestamp, row))
+        return completed
+
+    def _emit(self):
+        bar = self.bar
+        self.bar = None
+        if self.bar_is_clipped:
+            self.bar_is_clipped = False
+            return None
+        return pd.Timestamp(bar["timestamp"], unit="ms"), {k: v for k, v in bar.items() if k != "timestamp"}
@@ -0,0 +1,191 @@
+import math
+from collections import deque
+import numpy as np
+
+# Rolling-window kernels shared by the indicators. Every window has a batch form working on
+# 1D or 2D (time x symbol) arrays along axis 0 and an incremental form taking one value at a
+# time; both do the same floating-point operations, so their results are identical. A window
+# containing NaN gives NaN, like pandas rolling() with its default min_periods.
+
+
+def rolling_extreme(values, window, func):
+    # Extremes of power-of-two blocks, doubled until the next doubling would pass the window.
+    # Two such blocks, one ending on the window's last row and one starting on its first,
+    # cover the window; overlapping doesn't matter for a max or min.
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    out = np.empty_like(values)
+    out[:window - 1] = np.nan
+    if n < window:
+        return out
+    # block[i] is the extreme of the `size` rows ending on row i + size - 1
+    block = values
+    scratch = [np.empty_like(values), np.empty_like(values)]
+    size = 1
+    while size * 2 <= window:
+        block = func(block[size:], block[:-size], out=scratch[0][:len(block) - size])
+        scratch.reverse()
+        size *= 2
+    func(block[window - size:], block[:n - window + 1], out=out[window - 1:])
+    return out
+
+
+def rolling_max(values, window):
+    return rolling_extreme(values, window, np.maximum)
+
+
+def rolling_min(values, window):
+    return rolling_extreme(values, window, np.minimum)
+
+
+def rolling_sum(values, window):
+    # Window sums from power-of-two partial sums (x[t] + ... + x[t - 2**k + 1]), so a window of
+    # w rows costs about 2*log2(w) passes instead of w. Every window is summed over its own rows
+    # only, with no running total to subtract from, so float error stays that of w additions
+    # whatever the series length or price level.
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    out = np.empty_like(values)
+    out[:window - 1] = np.nan
+    if n < window:
+        return out
+    total = out[window - 1:]
+    # block[i] is the sum of the `size` rows ending on row i + size - 1. Each doubling writes into
+    # the other of two scratch arrays, so they are allocated once per call.
+    block = values
+    scratch = [np.empty_like(values), np.empty_like(values)]
+    size = 1
+    covered = 0
+    while True:
+        if window & size:
+            # Add this block to the rows already covered, ending `covered` rows earlier
+            part = block[window - covered - size:n - covered - size + 1]
+            if covered:
+                np.add(total, part, out=total)
+            else:
+                total[...] = part
+            covered += size
+        if size * 2 > window:
+            break
+        block = np.add(block[size:], block[:-size], out=scratch[0][:len(block) - size])
+        scratch.reverse()
+        size *= 2
+    return out
+
+
+def rolling_mean_var(values, window):
+    # Variance is the population one (ddof=0)
+    values = np.asarray(values, dtype=float)
+    mean = rolling_sum(values, window)
+    mean /= window
+    var = rolling_sum(values * values, window)
+    var /= window
+    var -= mean * mean
+    np.maximum(var, 0.0, out=var)
+    return mean, var
+
+
+def rolling_mean(values, window):
+    mean = rolling_sum(values, window)
+    mean /= window
+    return mean
+
+
+def ratio(numerator, denominator):
+    # NaN where the denominator is zero, in batch and incremental code alike
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator == 0, np.nan, numerator / denominator)
+
+
+def scalar_ratio(numerator, denominator):
+    if denominator == 0 or math.isnan(denominator) or math.isnan(numerator):
+        return math.nan
+    return numerator / denominator
+
+
+class RollingExtreme:
+    # Monotonic deque over the last `window` values. Values are stored multiplied by `sign`
+    # (1 for max, -1 for min) and kept non-increasing, so the front is the first occurrence
+    # of the window's extreme and every push is amortized O(1)
+    def __init__(self, window, sign=1):
+        self.window = window
+        self.sign = sign
+        self.items = deque()
+        self.count = 0
+        self.last_nan = -window
+
+    def push(self, value):
+        index = self.count
+        self.count += 1
+        if math.isnan(value):
+            self.last_nan = index
+        else:
+            value *= self.sign
+            while self.items and self.items[-1][1] < value:
+                self.items.pop()
+            self.items.append((index, value))
+        while self.items and self.items[0][0] <= index - self.window:
+            self.items.popleft()
+        return self.value()
+
+    def value(self):
+        if self.count < self.window or self.count - 1 - self.last_nan < self.window:
+            return math.nan
+        return self.items[0][1] * self.sign
+
+    def strict_extreme_at(self, index):
+        # The value at `index` is beyond every other value in the window, like argrelextrema's np.greater
+        if self.count < self.window or not self.items or self.items[0][0] != index:
+            return False
+        return len(self.items) == 1 or self.items[1][1] < self.items[0][1]
+
+
+class RollingSum:
+    # Incremental rolling_sum: the same power-of-two partial sums, added in the same order.
+    # levels[k] holds the sums of 2**k values ending on each of the last `window` values.
+    def __init__(self, window):
+        self.window = window
+        self.count = 0
+        self.levels = [deque(maxlen=window) for _ in range(window.bit_length())]
+
+    def push(self, value):
+        self.count += 1
+        self.levels[0].append(value)
+        half = 1
+        for lower, level in zip(self.levels, self.levels[1:]):
+            if len(lower) <= half:
+                break
+            level.append(lower[-1] + lower[-1 - half])
+            half *= 2
+        return self.value()
+
+    def value(self):
+        if self.count < self.window:
+            return math.nan
+        total = None
+        covered = 0
+        for k, level in enumerate(self.levels):
+            if self.window & (1 << k):
+                part = level[-1 - covered]
+                total = part if total is None else total + part
+                covered += 1 << k
+        return total
+
+
+class RollingStats:
+    # Incremental rolling_mean_var
+    def __init__(self, window):
+        self.window = window
+        self.sums = RollingSum(window)
+        self.squares = RollingSum(window)
+
+    def push(self, value):
+        self.sums.push(value)
+        self.squares.push(value * value)
+        return self.mean_var()
+
+    def mean_var(self):
+        if self.sums.count < self.window:
+            return math.nan, math.nan
+        mean = self.sums.value() / self.window
+        return mean, max(self.squares.value() / self.window - mean * mean, 0.0)
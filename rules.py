@@ -0,0 +1,175 @@
+import ast
+import numpy as np
+from indicators import INDICATORS, PRICE_COLUMNS
+
+# Strategy rules are Python-like expressions over indicator columns, e.g.
+# "rsi_5 < 30 and rsi_down_3 and close > ma_20". They are parsed once into a tree of NumPy
+# calls, so evaluating a rule is one array operation per node for the whole frame.
+COMPARE_OPS = {
+    ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater,
+    ast.GtE: np.greater_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal,
+}
+BINARY_OPS = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide}
+FUNCTIONS = {"abs": np.abs, "min": np.minimum, "max": np.maximum}
+
+
+def _shift(values, periods, fill=np.nan):
+    shifted = np.full(len(values), fill)
+    if periods < len(values):
+        shifted[periods:] = values[:len(values) - periods]
+    return shifted
+
+
+def _truthy(values):
+    # Nonzero and not NaN. Bool columns can't hold NaN and pass through without a copy.
+    values = np.asarray(values)
+    if values.dtype == bool:
+        return values
+    return np.logical_and(values != 0, values == values)
+
+
+def _shift_condition(condition, periods):
+    # A constant condition reads the same on every bar
+    return condition if np.ndim(condition) == 0 else _shift(condition, periods, False)
+
+
+def _number(values):
+    # Arithmetic on bool columns counts them as 0/1, like the float columns they used to be
+    return values.astype(float) if isinstance(values, np.ndarray) and values.dtype == bool else values
+
+
+class Rule:
+    def __init__(self, expression):
+        self.expression = expression
+        self.columns = []
+        # Bars before the current one the rule reads through prev()
+        self.lookback = 0
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid rule {expression!r}: {e.msg}")
+        self.evaluate = self._compile_condition(tree.body, 0)
+
+    def __call__(self, columns, length):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = self.evaluate(columns)
+        return np.broadcast_to(np.asarray(result, dtype=bool), (length,))
+
+    def _fail(self, node, reason):
+        raise ValueError(f"Invalid rule {self.expression!r}: {reason} at column {node.col_offset}")
+
+    def _compile_condition(self, node, shift):
+        # Operands of and/or/not as bool arrays; comparisons already are, other values are true when
+        # nonzero. NaN counts as false, and so does prev() before the first bar: no history, no condition.
+        if self._is_prev(node):
+            periods = self._prev_periods(node, shift)
+            condition = self._compile_condition(node.args[0], shift + periods)
+            return lambda cols: _shift_condition(condition(cols), periods)
+        evaluate = self._compile(node, shift)
+        if isinstance(node, (ast.Compare, ast.BoolOp)) or isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return evaluate
+        return lambda cols: _truthy(evaluate(cols))
+
+    @staticmethod
+    def _is_prev(node):
+        return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "prev"
+
+    def _prev_periods(self, node, shift):
+        # prev(expr, n): value of expr n bars ago
+        if len(node.args) not in (1, 2) or node.keywords:
+            self._fail(node, "prev takes an expression and an optional bar count")
+        periods = 1
+        if len(node.args) == 2:
+            if not isinstance(node.args[1], ast.Constant) or type(node.args[1].value) is not int:
+                self._fail(node, "prev needs a whole number of bars")
+            periods = node.args[1].value
+        self.lookback = max(self.lookback, shift + periods)
+        return periods
+
+    def _compile(self, node, shift):
+        if isinstance(node, ast.BoolOp):
+            op = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            parts = [self._compile_condition(value, shift) for value in node.values]
+
+            def evaluate(cols):
+                result = parts[0](cols)
+                for part in parts[1:]:
+                    result = op(result, part(cols))
+                return result
+            return evaluate
+
+        if isinstance(node, ast.UnaryOp):
+            if isinstance(node.op, ast.Not):
+                condition = self._compile_condition(node.operand, shift)
+                return lambda cols: np.logical_not(condition(cols))
+            operand = self._compile(node.operand, shift)
+            if isinstance(node.op, ast.USub):
+                return lambda cols: np.negative(_number(operand(cols)))
+            self._fail(node, "unsupported operator")
+
+        if isinstance(node, ast.Compare):
+            # Chained comparisons like "20 < rsi_5 < 40" are joined with and, as in Python
+            operands = [self._compile(node.left, shift)] + [self._compile(c, shift) for c in node.comparators]
+            ops = []
+            for op in node.ops:
+                if type(op) not in COMPARE_OPS:
+                    self._fail(node, "unsupported comparison")
+                ops.append(COMPARE_OPS[type(op)])
+            if len(ops) == 1:
+                op, left, right = ops[0], operands[0], operands[1]
+                return lambda cols: op(left(cols), right(cols))
+
+            def evaluate(cols):
+                left = operands[0](cols)
+                result = True
+                for op, operand in zip(ops, operands[1:]):
+                    right = operand(cols)
+                    result = np.logical_and(result, op(left, right))
+                    left = right
+                return result
+            return evaluate
+
+        if isinstance(node, ast.BinOp):
+            if type(node.op) not in BINARY_OPS:
+                self._fail(node, "unsupported operator")
+            op = BINARY_OPS[type(node.op)]
+            left = self._compile(node.left, shift)
+            right = self._compile(node.right, shift)
+            return lambda cols: op(_number(left(cols)), _number(right(cols)))
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            name = node.func.id
+            if name == "prev":
+                # As a value, NaN before the first bar
+                periods = self._prev_periods(node, shift)
+                inner = self._compile(node.args[0], shift + periods)
+                return lambda cols: _shift(np.asarray(inner(cols), dtype=float), periods)
+            if name in FUNCTIONS:
+                func = FUNCTIONS[name]
+                args = [self._compile(arg, shift) for arg in node.args]
+                if name == "abs" and len(args) != 1 or name != "abs" and len(args) != 2:
+                    self._fail(node, f"wrong number of arguments to {name}")
+                return lambda cols: func(*[_number(arg(cols)) for arg in args])
+            self._fail(node, f"unknown function {name}")
+
+        if isinstance(node, ast.Name):
+            name = node.id
+            if name not in INDICATORS and name not in PRICE_COLUMNS:
+                self._fail(node, f"unknown column {name}")
+            if name not in self.columns:
+                self.columns.append(name)
+            return lambda cols: cols[name]
+
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float, bool):
+            value = node.value
+            return lambda cols: value
+
+        self._fail(node, f"unsupported syntax {type(node).__name__}")
+
+
+def rule_columns(df, rules):
+    # Arrays of every column the rules read: bool columns stay bool, everything else becomes float
+    names = []
+    for rule in rules:
+        names += [name for name in rule.columns if name not in names]
+    return {name: df[name].to_numpy(dtype=bool if df[name].dtype == bool else float) for name in names}
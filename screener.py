@@ -2,11 +2,15 @@
 import pygame
 import datetime
 from fetcher import fetch_binance_ohlc, batch_fetch, load_backtest_data
-from config import LAYER1_COINS, BAR_HEIGHT, BAR_X, BAR_Y, BAR_WIDTH, WHITE, GREEN, BLACK
-from indicators import add_indicators
+from config import LAYER1_COINS, STREAM_KLINES, BAR_HEIGHT, BAR_X, BAR_Y, BAR_WIDTH, WHITE, GREEN, BLACK
+from indicator_engine import IndicatorEngine
 from slack_api import send_slack_alert
 from trader import exit_trade, enter_trade, get_balance, sell_all_non_usdt
-from strategy import apply_strategy
+from strategy import last_signal, REQUIRED_COLUMNS, RULE_HISTORY, BUY, SELL
+from indicators import required_history
+from kline_stream import KlineStream
+from metrics import StreamingMetrics
+import queue
 import time
 
 def run_screener(screen):
@@ -28,30 +32,43 @@ def run_screener(screen):
     backtest_balance = 1
     sl = 100
     tp = 100
-
-    def fetch_and_process(screen_obj):
+    # Indicator state carries over between cycles, so each cycle only pays for its new candles
+    engine = IndicatorEngine()
+    # Enough candles for the strategy's indicators and rules to be valid and for the 100-candle chart
+    history = max(required_history(REQUIRED_COLUMNS + ["atr"]) + RULE_HISTORY - 1, 100)
+    stream = None
+    # Drawdown, Sharpe and the rest of the live account. They annualize per hour, so they take one
+    # equity value per closed hour; streaming can split an hour's bar closes over several cycles.
+    live_metrics = StreamingMetrics()
+    metrics_hour = None
+
+    def fetch_and_process(screen_obj, fetched_data=None):
         nonlocal in_position, holding_symbol, entry_price, holding_idx, tp, sl, backtest_balance, position_size, latest_holding_value, last_run, next_run
+        nonlocal metrics_hour
         last_run = datetime.datetime.now()
         next_run = (last_run + datetime.timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
         if next_run <= last_run:
             next_run += datetime.timedelta(hours=1)
-        fetched_data = batch_fetch(list(LAYER1_COINS.values()))
-        idx = 0
+        if fetched_data is None:
+            fetched_data = batch_fetch(list(LAYER1_COINS.values()), limit=history)
         if in_position:
             df = fetched_data[holding_idx]
-            df = add_indicators(df)
-            df = apply_strategy(df)
-            signal = df["signal"].iloc[-1]
+            if df is None:
+                print(f"⚠️ No data for {holding_symbol} this cycle, holding position")
+                return
+            df = engine.frame(holding_symbol, df, forming_last=stream is None)
+            signal = last_signal(df)
             price = df["close"].iloc[-1]
             gain = (price - entry_price) / entry_price
             latest_holding_value = price
-            if signal == "SELL" or -sl > gain or tp < gain:
+            if signal == SELL or -sl > gain or tp < gain:
                 exit_trade(holding_symbol)
                 send_slack_alert(f"🔻 SELL: {holding_symbol} at {price}")
                 in_position = False
                 holding_symbol = None
                 holding_idx = None
                 backtest_balance *= 1+gain
+                live_metrics.add_trade(gain)
                 entry_price = 0
                 position_size = 0
                 latest_holding_value = 0
@@ -59,18 +76,17 @@ def run_screener(screen):
                 temp_change = (temp_balance - starting_balance) / starting_balance
                 print(f"Current P/L: {int(temp_change * 10000) / 100}%")
         else:
-            for name, symbol in LAYER1_COINS.items():
+            for idx, symbol in enumerate(LAYER1_COINS.values()):
                 df = fetched_data[idx]
                 if df is None or len(df) < 50:
                     continue
-                df = add_indicators(df)
-                df = apply_strategy(df)
+                df = engine.frame(symbol, df, forming_last=stream is None)
                 screen_obj.fill(WHITE)
                 draw_candlestick_chart(screen_obj, df, symbol)
                 pygame.display.flip()
-                signal = df["signal"].iloc[-1]
+                signal = last_signal(df)
                 price = df["close"].iloc[-1]
-                if signal == "BUY":
+                if signal == BUY:
                     atr = df["atr"].iloc[-1]
                     tp = atr * 2.5
                     sl = atr * 3
@@ -82,16 +98,40 @@ def run_screener(screen):
                     holding_symbol = symbol
                     entry_price = price
                     break
-                idx += 1
-
-    fetch_and_process(screen)
+        hour = last_run.replace(minute=0, second=0, microsecond=0)
+        if hour != metrics_hour:
+            try:
+                live_metrics.update((get_balance() + position_size*latest_holding_value) / starting_balance, in_position)
+                metrics_hour = hour
+            except Exception as e:
+                print(e)
+
+    closed_bars = queue.Queue()
+    if STREAM_KLINES:
+        # Bars are evaluated as soon as the exchange closes them instead of polling after the hour
+        stream = KlineStream(LAYER1_COINS.values(), on_bar_close=lambda symbol, df: closed_bars.put(symbol))
+        stream.start_in_thread()
+        last_run = datetime.datetime.now()
+        next_run = (last_run + datetime.timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
+    else:
+        fetch_and_process(screen)
 
     while True:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if stream:
+                    stream.stop()
                 return
         now = datetime.datetime.now()
-        if now >= next_run:
+        if stream:
+            closed = set()
+            while not closed_bars.empty():
+                closed.add(closed_bars.get())
+            # Only symbols whose bar just closed are evaluated; the rest come through as None
+            if closed and (not in_position or holding_symbol in closed):
+                fetch_and_process(screen, [stream.frame(symbol) if symbol in closed else None
+                                           for symbol in LAYER1_COINS.values()])
+        elif now >= next_run:
             fetch_and_process(screen)
             last_run = now
             next_run = last_run.replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1)
@@ -113,6 +153,9 @@ def run_screener(screen):
             profit_msg = f"Unrealized P/L: {int(change*10000)/100}%"
             profit_msg_surface = font.render(profit_msg, True, BLACK)
             screen.blit(profit_msg_surface, (BAR_X, BAR_Y - 90))
+            live = live_metrics.snapshot()
+            metrics_msg = f"Max DD: {round(live['max_drawdown'], 2)}%  Sharpe: {round(live['sharpe_ratio'], 2)}"
+            screen.blit(font.render(metrics_msg, True, BLACK), (BAR_X, BAR_Y - 60))
         except Exception as e:
             print(e)
 
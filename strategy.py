@@ -1,19 +1,36 @@
 import random
+import numpy as np
 
-from config import BUY_BP, BUY_RSI, BUY_STOCH, SELL_RSI, SELL_BP, SELL_STOCH
+from config import BUY_BP, BUY_RSI, BUY_STOCH, SELL_RSI, SELL_BP, SELL_STOCH, TREND_FILTER, BUY_RULE, SELL_RULE
+from rules import Rule, rule_columns
 
+# Entry and exit rules come from settings.json and are compiled once at import
+buy_rule = Rule(BUY_RULE)
+sell_rule = Rule(SELL_RULE)
+# With the trend filter on, buys are skipped while swings make lower highs and lower lows
+if TREND_FILTER:
+    buy_rule = Rule(f"({BUY_RULE}) and trend >= 0")
 
-def get_signal(row):
-    if row["rsi_signal_buy"]:
-        return "BUY"
-    elif row["rsi_signal_sell"]:
-        return "SELL"
-    return "NEUTRAL"
+# Indicator columns the rules read; only these (and their inputs) need computing
+REQUIRED_COLUMNS = list(dict.fromkeys(buy_rule.columns + sell_rule.columns))
+# Bars the rules look back through prev(), plus the current one
+RULE_HISTORY = max(buy_rule.lookback, sell_rule.lookback) + 1
 
+# Signals are int8 codes; SIGNAL_NAMES turns them back into labels for logs and alerts
+NEUTRAL = 0
+BUY = 1
+SELL = -1
+SIGNAL_NAMES = {NEUTRAL: "NEUTRAL", BUY: "BUY", SELL: "SELL"}
 
-def apply_strategy(df):
-    df = df.copy()
-    if "signal" not in df.columns:
-        df["signal"] = "NEUTRAL"
-    df.at[df.index[-1], "signal"] = get_signal(df.iloc[-1])
-    return df
+
+def signal_array(df):
+    # One pass over the whole frame instead of a Python call per row
+    cols = rule_columns(df, [buy_rule, sell_rule])
+    buy = buy_rule(cols, len(df))
+    sell = sell_rule(cols, len(df))
+    return np.where(buy, BUY, np.where(sell, SELL, NEUTRAL)).astype(np.int8)
+
+
+def last_signal(df):
+    # Live use only needs the newest bar and what the rules look back on
+    return int(signal_array(df.iloc[-RULE_HISTORY:])[-1])
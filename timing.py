@@ -0,0 +1,18 @@
+import time
+
+
+# Timing helpers shared by the bench_*.py scripts
+def best_of(func, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def timed(func):
+    # One run, for results the bench checks afterwards
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
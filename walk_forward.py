@@ -0,0 +1,123 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from config import LAYER1_COINS
+from fetcher import load_backtest_data
+from backtest_engine import (history_arrays, slice_arrays, run_backtest_arrays, close_open_position, summarize,
+                             TP_MULT, SL_MULT)
+from optimizer import SEARCH_SPACE, grid
+
+IN_SAMPLE = 480
+OUT_OF_SAMPLE = 120
+RESULTS_PATH = "walk_forward_results.csv"
+# Indicators are computed once for the whole history, so only the trade parameters are searched
+TRADE_SPACE = {key: values for key, values in SEARCH_SPACE.items() if "." not in key}
+
+# Per-process state, filled once by the pool initializer
+_worker = {}
+
+
+def windows(n_steps, in_sample=IN_SAMPLE, out_of_sample=OUT_OF_SAMPLE):
+    # (start, split, end): optimize on [start, split), test on [split, end), then roll forward
+    # by one out-of-sample length so the test windows tile the history without overlap
+    result = []
+    start = 0
+    while start + in_sample + out_of_sample <= n_steps:
+        result.append((start, start + in_sample, start + in_sample + out_of_sample))
+        start += out_of_sample
+    return result
+
+
+def _run(arrays, params):
+    state = run_backtest_arrays(arrays, tp_mult=params.get("tp_mult", TP_MULT), sl_mult=params.get("sl_mult", SL_MULT),
+                                cooldown_time=params.get("cooldown_time", 0))
+    # A position open at the window's end is closed at its last close, so its gain counts in this
+    # window instead of in neither this one nor the next
+    closed = close_open_position(state, arrays)
+    return {**summarize(state.equity, state.trades, state.capital), "closed_at_end": int(closed)}
+
+
+def _init_worker(arrays, candidates, metric):
+    _worker["arrays"] = arrays
+    _worker["candidates"] = candidates
+    _worker["metric"] = metric
+
+
+def evaluate_window(window):
+    start, split, end = window
+    arrays, metric = _worker["arrays"], _worker["metric"]
+    best = {"tp_mult": TP_MULT, "sl_mult": SL_MULT, "cooldown_time": 0}
+    best_score = None
+    if _worker["candidates"] and split > start:
+        in_sample = slice_arrays(arrays, start, split)
+        for params in _worker["candidates"]:
+            score = _run(in_sample, params)[metric]
+            if best_score is None or score > best_score:
+                best, best_score = params, score
+    stats = _run(slice_arrays(arrays, split, end), best)
+    index = arrays["index"]
+    return {"start": index[start], "split": index[split], "end": index[end - 1], **best,
+            f"in_sample_{metric}": best_score, **stats}
+
+
+def walk_forward(arrays, in_sample=IN_SAMPLE, out_of_sample=OUT_OF_SAMPLE, space=TRADE_SPACE, metric="total_gain",
+                 workers=None):
+    # With space=None each window just runs the current parameters: a plain rolling-window backtest
+    candidates = grid(space) if space else []
+    if not space:
+        in_sample = 0
+    tasks = windows(len(arrays["close"]), in_sample, out_of_sample)
+    if not tasks:
+        print("❌ Not enough history for one in-sample and out-of-sample window")
+        return None
+    workers = min(workers or os.cpu_count(), len(tasks))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(arrays, candidates, metric)) as pool:
+        rows = list(pool.map(evaluate_window, tasks))
+    return pd.DataFrame(rows)
+
+
+def aggregate(results):
+    gains = results["total_gain"] / 100
+    return {
+        "windows": len(results),
+        "profitable_windows": round(float((gains > 0).mean() * 100), 2),
+        "mean_gain": round(float(gains.mean() * 100), 2),
+        "median_gain": round(float(gains.median() * 100), 2),
+        "worst_gain": round(float(gains.min() * 100), 2),
+        "compounded_gain": round(float((np.prod(1 + gains) - 1) * 100), 2),
+        "mean_max_drawdown": round(float(results["max_drawdown"].mean()), 2),
+        "total_trades": int(results["total"].sum()),
+        "closed_at_end": int(results["closed_at_end"].sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest over the stored history")
+    parser.add_argument("--in-sample", type=int, default=IN_SAMPLE)
+    parser.add_argument("--out-of-sample", type=int, default=OUT_OF_SAMPLE)
+    parser.add_argument("--no-optimize", action="store_true", help="run the current parameters on rolling windows")
+    parser.add_argument("--metric", default="total_gain")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    symbols = list(LAYER1_COINS.values())
+    coin_data = load_backtest_data(symbols)
+    if not coin_data:
+        return
+    arrays = history_arrays(coin_data, symbols)
+    results = walk_forward(arrays, args.in_sample, args.out_of_sample, None if args.no_optimize else TRADE_SPACE,
+                           args.metric, args.workers)
+    if results is None:
+        return
+    results.to_csv(args.output, index=False)
+    print(results.to_string())
+    for key, value in aggregate(results).items():
+        print(f"{key}: {value}")
+    print(f"✅ Saved {len(results)} windows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()